@@ -1,34 +1,50 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routes.mobile_endpoints import mobile_router
 from routes.dashboard_endpoints import dashboard_router
 # from services.mobile import load_config
 import os
+import sys
 from pathlib import Path
 import logging
+import anyio
+import orjson
 
 
 # Create FastAPI app
 app = FastAPI(
     title="Digitopia Media API",
     description="API for receiving media files (images/videos) with location data from Flutter app",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS for Flutter app
+# Configure CORS for the dashboard (the Flutter app is native and sends no Origin)
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173,http://localhost:8080").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your Flutter app's origin
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Authorization", "Content-Type", "Accept", "If-None-Match", "ngrok-skip-browser-warning"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+@app.on_event("startup")
+async def configure_threadpool():
+    """Raise the threadpool size used for sync handlers and password hashing"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 100
+
+
 # Create upload directories inside data folder
 UPLOAD_DIR = Path("data/uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-(UPLOAD_DIR / "images").mkdir(exist_ok=True)
-(UPLOAD_DIR / "videos").mkdir(exist_ok=True)
+for sub in ("images", "videos"):
+    (UPLOAD_DIR / sub).mkdir(parents=True, exist_ok=True)
 
 # Load configuration on startup
 # load_config()
@@ -37,46 +53,68 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 app.include_router(mobile_router, prefix="/api/mobile", tags=["Mobile"])
 app.include_router(dashboard_router, prefix="/api/dashboard", tags=["Dashboard"])
 
-# Add backward compatibility routes (without /api/mobile prefix)
-# This allows existing Flutter app to work without changes
-app.include_router(mobile_router, tags=["Mobile - Legacy"])
+
+# Backward compatibility for old Flutter builds (paths without /api/mobile).
+# Rewriting the path keeps a single copy of the mobile routes in the router.
+LEGACY_MOBILE_PREFIXES = ("/upload-media", "/incidents/formatted", "/location/", "/health")
+
+
+class LegacyMobilePathMiddleware:
+    """Rewrite legacy mobile paths to their /api/mobile equivalents"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(LEGACY_MOBILE_PREFIXES):
+            scope = dict(scope)
+            scope["path"] = "/api/mobile" + scope["path"]
+            if scope.get("raw_path"):
+                scope["raw_path"] = b"/api/mobile" + scope["raw_path"]
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(LegacyMobilePathMiddleware)
+
+# The root payload never changes, so it is serialized once at import time
+ROOT_RESPONSE_BYTES = orjson.dumps({
+    "message": "Digitopia Media API",
+    "version": "1.0.0",
+    "structure": "New organized structure with backward compatibility",
+    "endpoints": {
+        "new_structure": {
+            "/api/mobile/upload-media": "POST - Upload image/video with location",
+            "/api/mobile/incidents/formatted": "GET - Get formatted incidents for Flutter app", 
+            "/api/mobile/location/{latitude}/{longitude}": "GET - Get location name for coordinates",
+            "/api/mobile/health": "GET - Health check",
+            "/api/mobile/register-user": "POST - Register user",
+            "/api/dashboard/...": "Dashboard endpoints (to be implemented)"
+        },
+        "legacy_support": {
+            "/upload-media": "POST - Upload image/video with location (legacy)",
+            "/incidents/formatted": "GET - Get formatted incidents for Flutter app (legacy)",
+            "/location/{latitude}/{longitude}": "GET - Get location name for coordinates (legacy)",
+            "/health": "GET - Health check (legacy)"
+        }
+    },
+    "note": "Legacy endpoints are provided for backward compatibility. Please migrate to /api/mobile/ prefix when possible."
+})
 
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
-    return {
-        "message": "Digitopia Media API",
-        "version": "1.0.0",
-        "structure": "New organized structure with backward compatibility",
-        "endpoints": {
-            "new_structure": {
-                "/api/mobile/upload-media": "POST - Upload image/video with location",
-                "/api/mobile/incidents/formatted": "GET - Get formatted incidents for Flutter app", 
-                "/api/mobile/location/{latitude}/{longitude}": "GET - Get location name for coordinates",
-                "/api/mobile/health": "GET - Health check",
-                "/api/mobile/register-user": "POST - Register user",
-                "/api/dashboard/...": "Dashboard endpoints (to be implemented)"
-            },
-            "legacy_support": {
-                "/upload-media": "POST - Upload image/video with location (legacy)",
-                "/incidents/formatted": "GET - Get formatted incidents for Flutter app (legacy)",
-                "/location/{latitude}/{longitude}": "GET - Get location name for coordinates (legacy)",
-                "/health": "GET - Health check (legacy)"
-            }
-        },
-        "note": "Legacy endpoints are provided for backward compatibility. Please migrate to /api/mobile/ prefix when possible."
-    }
+    return Response(content=ROOT_RESPONSE_BYTES, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
     print("Starting server...")
-    
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    if not os.path.exists("data/uploads"):
-        os.makedirs("data/uploads")
-    if not os.path.exists("data/uploads/images"):
-        os.makedirs("data/uploads/images")
-    if not os.path.exists("data/uploads/videos"):
-        os.makedirs("data/uploads/videos")
-    uvicorn.run(app, host="127.0.0.1", port=8000, reload=True)
+    # Development server: one auto-reloading process.
+    # Production runs under Gunicorn instead (gunicorn app:app -c gunicorn_conf.py)
+    uvicorn.run(
+        "app:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=True,
+    )
@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for running the API in production.
+
+Usage (from the backend/ folder):
+  gunicorn app:app -c gunicorn_conf.py
+
+Each worker is a separate uvicorn process, so requests are spread across all
+CPU cores. Put Nginx in front for TLS. Uploaded media is never served
+publicly: it only goes out through the dashboard media endpoints, which can
+hand the checked file to Nginx with USE_X_ACCEL (internal location).
+
+Every worker opens its own database pool, so the worker count and the pool
+size are derived from one connection budget, DB_CONNECTION_BUDGET (default
+90, below PostgreSQL's default max_connections=100 to leave room for admin
+sessions and migrations):
+
+  workers     = GUNICORN_WORKERS (at most DB_CONNECTION_BUDGET), or 2*cpu+1
+                capped so that every worker gets at least MIN_POOL_PER_WORKER
+                connections
+  DB_POOL_MAX = DB_CONNECTION_BUDGET // workers (or a smaller DB_POOL_MAX
+                from the environment)
+
+so workers * DB_POOL_MAX never exceeds the budget.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Fewest pooled connections a worker should get
+MIN_POOL_PER_WORKER = 4
+
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "90"))
+if DB_CONNECTION_BUDGET < 1:
+    raise ValueError("DB_CONNECTION_BUDGET must be at least 1")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv(
+    "GUNICORN_WORKERS",
+    max(1, min(2 * (os.cpu_count() or 1) + 1, DB_CONNECTION_BUDGET // MIN_POOL_PER_WORKER)),
+))
+# Every worker needs at least one connection of the budget
+workers = max(1, min(workers, DB_CONNECTION_BUDGET))
+keepalive = 5
+
+# Workers are forked from this process and read the pool size from the
+# environment when models.db_helper is imported
+_pool_max = DB_CONNECTION_BUDGET // workers
+if "DB_POOL_MAX" in os.environ:
+    _pool_max = min(_pool_max, int(os.environ["DB_POOL_MAX"]))
+os.environ["DB_POOL_MAX"] = str(_pool_max)
+if "DB_POOL_MIN" in os.environ:
+    os.environ["DB_POOL_MIN"] = str(min(int(os.environ["DB_POOL_MIN"]), _pool_max))
@@ -25,6 +25,9 @@ DEFAULT_PASSWORD: str = ""
 # Set to True/False to force active flag; keep as None to show prompt
 DEFAULT_ACTIVE: Optional[bool] = None
 
+# bcrypt cost factor (each +1 doubles hashing time)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 # Make sure we can import models.db_helper when running from repo root or backend/
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_DIR = os.path.dirname(CURRENT_DIR)
@@ -42,24 +45,24 @@ def create_dashboard_user(username: str, full_name: str, password: str, active:
         conn = get_db_connection()
         cur = conn.cursor()
 
-        # Check for duplicate username
-        cur.execute("SELECT id FROM dashboard_users WHERE username = %s;", (username,))
-        if cur.fetchone():
-            raise ValueError(f"Username '{username}' already exists")
-
         # Hash password with bcrypt
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         password_hash = bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
+        # Insert and duplicate check in one statement (username is UNIQUE)
         cur.execute(
             """
             INSERT INTO dashboard_users (username, full_name, password_hash, is_active, created_at)
             VALUES (%s, %s, %s, %s, NOW())
+            ON CONFLICT (username) DO NOTHING
             RETURNING id;
             """,
             (username, full_name, password_hash, active),
         )
-        user_id = cur.fetchone()[0]
+        row = cur.fetchone()
+        if not row:
+            raise ValueError(f"Username '{username}' already exists")
+        user_id = row[0]
         conn.commit()
         return user_id
     finally:
@@ -1,93 +1,237 @@
 import psycopg2
-from psycopg2.extras import Json
+import psycopg2.pool
+from psycopg2.extras import Json, RealDictCursor, execute_values, register_default_json, register_default_jsonb
 from dotenv import load_dotenv
+import orjson
 import os
 import logging
+import threading
+import hashlib
+import io
+import csv
+from contextlib import contextmanager
 from typing import Dict, Any, Optional
-import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
-    """Create and return a database connection"""
+# Decode json/jsonb result columns (media_files, detected_events, real_files) with orjson
+register_default_json(globally=True, loads=orjson.loads)
+register_default_jsonb(globally=True, loads=orjson.loads)
+
+# Incidents with at least this many media files load them with COPY instead of INSERT
+MEDIA_COPY_THRESHOLD = 50
+
+# AI analysis keys stored as plain incident columns (in column order)
+_ANALYSIS_FIELDS = (
+    'category', 'title', 'description', 'severity', 'verified',
+    'violence_type', 'weapon', 'site_description', 'number_of_people',
+    'description_of_people', 'detailed_description_for_the_incident',
+    'accident_type', 'vehicles_machines_involved', 'utility_type',
+    'extent_of_impact', 'duration', 'illegal_type', 'items_involved',
+)
+
+# Rows per statement for bulk inserts
+BULK_PAGE_SIZE = 1000
+
+# Rows per round-trip when streaming incidents from the server-side cursor
+INCIDENTS_FETCH_BATCH = 2000
+
+# Connection pool settings. psycopg2 closes a returned connection once DB_POOL_MIN
+# are idle, so the minimum defaults to the maximum: otherwise connections are
+# opened and closed on almost every request under load
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+DB_POOL_MIN = min(int(os.getenv("DB_POOL_MIN", str(DB_POOL_MAX))), DB_POOL_MAX)
+# Per-query time limit for pooled sessions (PostgreSQL interval, e.g. "5s").
+# Bulk writes, COPY and unbounded listings lift it with transaction(long_running=True)
+DB_STATEMENT_TIMEOUT = os.getenv("DB_STATEMENT_TIMEOUT", "5s")
+
+# Session settings sent with the startup packet (no extra round-trip): the
+# queries here are short OLTP statements where JIT compilation and custom
+# re-planning of prepared statements cost more than they save
+_SESSION_OPTIONS = (
+    "-c jit=off "
+    "-c plan_cache_mode=force_generic_plan "
+    f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+)
+
+# Connection parameters, read once at import
+_DSN_PARAMS = {
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT"),
+}
+_MISSING_DSN_KEYS = [key for key, value in _DSN_PARAMS.items() if value is None]
+if _MISSING_DSN_KEYS:
+    logger.warning("Database settings missing from environment: %s", ', '.join(_MISSING_DSN_KEYS))
+
+# Complete libpq connection string (settings + session options), built once
+_DSN = psycopg2.extensions.make_dsn(options=_SESSION_OPTIONS, **_DSN_PARAMS)
+
+_pool = None
+_pool_lock = threading.Lock()
+# Callers wait for a free slot instead of getting PoolError when the pool is busy
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection whose close() returns it to the pool instead of disconnecting"""
+
+    def close(self):
+        if getattr(self, "_released", False):
+            return  # Already handed back, a second close() must not disconnect it
+        pool = getattr(self, "_pool", None)
+        if pool is None or self.closed:
+            super().close()
+            return
+        self._pool = None
+        _release_connection(pool, self)
+        self._released = True
+
+
+class OrJson(Json):
+    """Json adapter that serializes with orjson instead of the stdlib json module"""
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _get_pool():
+    """Create the pool on first use (after any worker fork)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if _MISSING_DSN_KEYS:
+                    raise RuntimeError(f"Database settings missing: {', '.join(_MISSING_DSN_KEYS)}")
+                _pool = psycopg2.pool.ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    _DSN,
+                    connection_factory=PooledConnection
+                )
+    return _pool
+
+
+def _acquire_connection():
+    """Borrow a connection from the pool"""
+    _pool_slots.acquire()
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT")
-        )
+        conn = _get_pool().getconn()
+        conn._pool = None
+        conn._released = False
         return conn
-    except Exception as e:
-        logger.error(f"Database connection failed: {str(e)}")
+    except Exception:
+        _pool_slots.release()
         raise
 
 
-def save_location(conn, latitude: float, longitude: float, address: str) -> int:
+def _release_connection(pool, conn, close: bool = False):
     """
-    Save location to database and return location_id
+    Give a borrowed connection back (the pool rolls back open transactions).
+    Broken connections are discarded so the next caller gets a fresh one.
     """
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO locations (address, latitude, longitude)
-            VALUES (%s, %s, %s)
-            RETURNING id;
-        """, (address, latitude, longitude))
-        
-        location_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        return location_id
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Error saving location: {str(e)}")
+        try:
+            pool.putconn(conn, close=close or bool(conn.closed))
+        except psycopg2.Error:
+            # Rolling back failed, the server side is gone
+            pool.putconn(conn, close=True)
+    finally:
+        _pool_slots.release()
+
+
+@contextmanager
+def db_conn():
+    """Borrow a pooled connection for the duration of a with-block"""
+    conn = _acquire_connection()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
         raise
+    finally:
+        _release_connection(_pool, conn, close=broken)
+        conn._released = True
 
 
-def get_or_create_user_by_device(device_id: str) -> Optional[int]:
+def get_db_connection():
     """
-    Get or create anonymous user by device_id
-    Anonymous users only have device_id (no national_id until they register)
-    Returns app_user_id
+    Return a pooled database connection.
+    Calling conn.close() hands it back to the pool.
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Check if device exists
-        cur.execute("SELECT id FROM app_users WHERE device_id = %s;", (device_id,))
-        result = cur.fetchone()
-        
-        if result:
-            user_id = result[0]
-            logger.info(f"Found existing user for device_id={device_id}, user_id={user_id}")
-        else:
-            # Create anonymous user (only device_id, no national_id)
-            cur.execute("""
-                INSERT INTO app_users (device_id)
-                VALUES (%s)
-                RETURNING id;
-            """, (device_id,))
-            user_id = cur.fetchone()[0]
-            conn.commit()
-            logger.info(f"Created anonymous user for device_id={device_id}, user_id={user_id}")
-        
-        cur.close()
-        conn.close()
-        return user_id
-        
+        conn = _acquire_connection()
+        conn._pool = _pool
+        return conn
     except Exception as e:
-        if conn:
-            conn.rollback()
-            conn.close()
-        logger.error(f"Error in get_or_create_user_by_device: {str(e)}")
-        return None
+        logger.error("Database connection failed: %s", e)
+        raise
+
+
+@contextmanager
+def transaction(name: Optional[str] = None, cursor_factory=None, long_running: bool = False):
+    """
+    Run a transaction on a pooled connection, yielding (conn, cur).
+    Commits on success, rolls back on error and always returns the connection.
+    long_running lifts the session's statement_timeout for this transaction only.
+    """
+    with db_conn() as conn:
+        with conn:
+            if long_running:
+                with conn.cursor() as setup_cur:
+                    setup_cur.execute("SET LOCAL statement_timeout = 0")
+            with conn.cursor(name=name, cursor_factory=cursor_factory) as cur:
+                yield conn, cur
+
+
+# SQL text -> (statement name, PREPARE body with $n placeholders)
+_prepared_sql = {}
+
+
+def _execute_prepared(cur, sql: str, params: tuple):
+    """
+    Run a query as a server-side prepared statement.
+    It is PREPAREd once per pooled connection (named after a hash of its text,
+    so edited SQL gets a new name); later calls only send EXECUTE.
+    """
+    entry = _prepared_sql.get(sql)
+    if entry is None:
+        statement = sql.strip().rstrip(';')
+        for position in range(1, len(params) + 1):
+            statement = statement.replace('%s', f'${position}', 1)
+        name = "stmt_" + hashlib.md5(sql.encode()).hexdigest()[:12]
+        entry = _prepared_sql[sql] = (name, statement)
+    name, statement = entry
+    
+    conn = cur.connection
+    prepared = getattr(conn, "_prepared_statements", None)
+    if prepared is None:
+        prepared = conn._prepared_statements = set()
+    if name not in prepared:
+        cur.execute(f"PREPARE {name} AS {statement}")
+        prepared.add(name)
+    cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))});", params)
+
+
+def _parse_incident_timestamp(timestamp) -> datetime:
+    """Parse a client ISO-8601 timestamp, falling back to the current UTC time"""
+    if isinstance(timestamp, datetime):
+        return timestamp
+    try:
+        return datetime.fromisoformat(timestamp)
+    except (ValueError, TypeError):
+        # Python < 3.11 does not accept a trailing 'Z'
+        try:
+            return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("Invalid incident timestamp %r, using current time", timestamp)
+            return datetime.now(timezone.utc)
 
 
 def save_ai_analysis_to_db(
@@ -96,7 +240,7 @@ def save_ai_analysis_to_db(
     latitude: float,
     longitude: float,
     address: str,
-    timestamp: str,
+    timestamp,
     file_paths: list,
     device_id: str,
     app_user_id: Optional[int] = None,
@@ -111,7 +255,7 @@ def save_ai_analysis_to_db(
         latitude: Latitude coordinate
         longitude: Longitude coordinate
         address: Geocoded address
-        timestamp: Incident timestamp
+        timestamp: Incident timestamp (ISO-8601 string or datetime)
         file_paths: List of file paths for media files
         device_id: Device ID of the reporter
         app_user_id: Optional user ID if not anonymous
@@ -120,157 +264,257 @@ def save_ai_analysis_to_db(
     Returns:
         True if successful, False otherwise
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        
-        # 1. Get or create user by device_id
-        if not app_user_id:
-            app_user_id = get_or_create_user_by_device(device_id)
-        
-        # 2. Save location
-        location_id = save_location(conn, latitude, longitude, address)
-        logger.info(f"Location saved with id={location_id}")
-        
-        # 3. Parse timestamp
-        try:
-            incident_timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-        except:
-            incident_timestamp = datetime.now()
-        
-        # 4. Save incident with AI analysis data
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO incidents (
+        # 1. Parse timestamp
+        incident_timestamp = _parse_incident_timestamp(timestamp)
+        use_copy = len(file_paths) >= MEDIA_COPY_THRESHOLD
+        app_user_id = app_user_id or None
+        
+        with transaction(long_running=use_copy) as (conn, cur):
+            # 2. Get or create the device's user, then save location, incident and
+            #    media files, all in one statement (a single round-trip)
+            _execute_prepared(cur, """
+                WITH usr AS (
+                    INSERT INTO app_users (device_id)
+                    SELECT %s
+                    WHERE %s::int IS NULL
+                    ON CONFLICT (device_id) DO UPDATE SET device_id = EXCLUDED.device_id
+                    RETURNING id
+                ),
+                loc AS (
+                    INSERT INTO locations (address, latitude, longitude)
+                    VALUES (%s, %s, %s)
+                    RETURNING id
+                ),
+                inc AS (
+                    INSERT INTO incidents (
+                        incident_id,
+                        app_user_id,
+                        category,
+                        title,
+                        description,
+                        severity,
+                        verified,
+                        violence_type,
+                        weapon,
+                        site_description,
+                        number_of_people,
+                        description_of_people,
+                        detailed_description_for_the_incident,
+                        accident_type,
+                        vehicles_machines_involved,
+                        utility_type,
+                        extent_of_impact,
+                        duration,
+                        illegal_type,
+                        items_involved,
+                        detected_events,
+                        timestamp,
+                        status,
+                        location_id,
+                        real_files
+                    )
+                    SELECT
+                        %s, COALESCE(%s::int, (SELECT id FROM usr)), %s, %s, %s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, loc.id, %s
+                    FROM loc
+                    RETURNING incident_id, location_id, app_user_id
+                ),
+                media AS (
+                    INSERT INTO media_files (incident_id, file_path)
+                    SELECT (SELECT incident_id FROM inc), fp
+                    FROM unnest(%s::text[]) AS t(fp)
+                )
+                SELECT location_id, app_user_id FROM inc
+            """, (
+                device_id,
+                app_user_id,
+                address,
+                latitude,
+                longitude,
                 incident_id,
                 app_user_id,
-                category,
-                title,
-                description,
-                severity,
-                verified,
-                violence_type,
-                weapon,
-                site_description,
-                number_of_people,
-                description_of_people,
-                detailed_description_for_the_incident,
-                accident_type,
-                vehicles_machines_involved,
-                utility_type,
-                extent_of_impact,
-                duration,
-                illegal_type,
-                items_involved,
-                detected_events,
-                timestamp,
-                status,
-                location_id,
-                real_files
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s
-            );
-        """, (
-            incident_id,
-            app_user_id,
-            ai_analysis.get('category'),
-            ai_analysis.get('title'),
-            ai_analysis.get('description'),
-            ai_analysis.get('severity'),
-            ai_analysis.get('verified'),
-            ai_analysis.get('violence_type'),
-            ai_analysis.get('weapon'),
-            ai_analysis.get('site_description'),
-            ai_analysis.get('number_of_people'),
-            ai_analysis.get('description_of_people'),
-            ai_analysis.get('detailed_description_for_the_incident'),
-            ai_analysis.get('accident_type'),
-            ai_analysis.get('vehicles_machines_involved'),
-            ai_analysis.get('utility_type'),
-            ai_analysis.get('extent_of_impact'),
-            ai_analysis.get('duration'),
-            ai_analysis.get('illegal_type'),
-            ai_analysis.get('items_involved'),
-            Json(ai_analysis.get('detected_events', [])),
-            incident_timestamp,
-            'pending',
-            location_id,
-            Json(real_files) if real_files else None
-        ))
-        
-        logger.info(f"Incident saved with id={incident_id}, user_id={app_user_id}")
-        
-        # 5. Save media files
-        for file_path in file_paths:
-            file_ext = os.path.splitext(file_path)[1].lower()
-            media_type = 'video' if file_ext in ['.mp4', '.avi', '.mov', '.mkv'] else 'image'
+                ai_analysis.get('category'),
+                ai_analysis.get('title'),
+                ai_analysis.get('description'),
+                ai_analysis.get('severity'),
+                ai_analysis.get('verified'),
+                ai_analysis.get('violence_type'),
+                ai_analysis.get('weapon'),
+                ai_analysis.get('site_description'),
+                ai_analysis.get('number_of_people'),
+                ai_analysis.get('description_of_people'),
+                ai_analysis.get('detailed_description_for_the_incident'),
+                ai_analysis.get('accident_type'),
+                ai_analysis.get('vehicles_machines_involved'),
+                ai_analysis.get('utility_type'),
+                ai_analysis.get('extent_of_impact'),
+                ai_analysis.get('duration'),
+                ai_analysis.get('illegal_type'),
+                ai_analysis.get('items_involved'),
+                OrJson(ai_analysis.get('detected_events', [])),
+                incident_timestamp,
+                'pending',
+                OrJson(real_files) if real_files else None,
+                [] if use_copy else list(file_paths)
+            ))
+            location_id, app_user_id = cur.fetchone()
             
-            cur.execute("""
-                INSERT INTO media_files (incident_id, file_path, media_type)
-                VALUES (%s, %s, %s);
-            """, (incident_id, file_path, media_type))
-        
-        logger.info(f"Saved {len(file_paths)} media file(s)")
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+            # 3. Stream large media batches through COPY in the same transaction
+            if use_copy:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    (incident_id, file_path) for file_path in file_paths
+                )
+                buffer.seek(0)
+                cur.copy_expert(
+                    "COPY media_files (incident_id, file_path) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            
+        logger.info("Incident saved with id=%s, user_id=%s, location_id=%s", incident_id, app_user_id, location_id)
+        if file_paths:
+            logger.info("Saved %s media file(s)", len(file_paths))
         
-        logger.info(f"✅ Successfully saved AI analysis for incident {incident_id} to database")
+        logger.info("✅ Successfully saved AI analysis for incident %s to database", incident_id)
         return True
         
     except Exception as e:
-        if conn:
-            conn.rollback()
-            conn.close()
-        logger.error(f"❌ Error saving AI analysis to database: {str(e)}")
+        logger.error("❌ Error saving AI analysis to database: %s", e)
         logger.exception("Full traceback:")
         return False
 
 
+def save_ai_analyses_bulk(records: list) -> int:
+    """
+    Save many analysed incidents at once (backfills / imports).
+    
+    Each record is a dict with the keyword arguments of save_ai_analysis_to_db
+    (incident_id, ai_analysis, latitude, longitude, address, timestamp,
+    file_paths, device_id and optionally app_user_id, real_files).
+    Users, locations, incidents and media files are each written with one
+    multi-row INSERT per page, in a single transaction. Nothing is saved if
+    any record fails (e.g. an incident_id that already exists).
+    
+    Returns:
+        Number of incidents saved
+    """
+    if not records:
+        return 0
+    try:
+        with transaction(long_running=True) as (conn, cur):
+            # 1. Resolve anonymous users for records without an app_user_id
+            device_ids = sorted({r['device_id'] for r in records if not r.get('app_user_id')})
+            user_ids = {}
+            if device_ids:
+                rows = execute_values(cur, """
+                    INSERT INTO app_users (device_id) VALUES %s
+                    ON CONFLICT (device_id) DO UPDATE SET device_id = EXCLUDED.device_id
+                    RETURNING device_id, id;
+                """, [(device_id,) for device_id in device_ids], page_size=BULK_PAGE_SIZE, fetch=True)
+                user_ids = dict(rows)
+        
+            # 2. Reserve location ids up front so each incident knows its location
+            cur.execute(
+                "SELECT nextval(pg_get_serial_sequence('locations', 'id')) FROM generate_series(1, %s);",
+                (len(records),)
+            )
+            location_ids = [row[0] for row in cur.fetchall()]
+            execute_values(cur, """
+                INSERT INTO locations (id, address, latitude, longitude) VALUES %s;
+            """, [
+                (location_id, r.get('address'), r['latitude'], r['longitude'])
+                for location_id, r in zip(location_ids, records)
+            ], page_size=BULK_PAGE_SIZE)
+        
+            # 3. Incidents
+            incident_rows = []
+            media_rows = []
+            for location_id, r in zip(location_ids, records):
+                ai_analysis = r.get('ai_analysis') or {}
+                real_files = r.get('real_files')
+                incident_rows.append((
+                    r['incident_id'],
+                    r.get('app_user_id') or user_ids.get(r['device_id']),
+                    *(ai_analysis.get(field) for field in _ANALYSIS_FIELDS),
+                    OrJson(ai_analysis.get('detected_events', [])),
+                    _parse_incident_timestamp(r.get('timestamp')),
+                    location_id,
+                    OrJson(real_files) if real_files else None
+                ))
+                media_rows.extend(
+                    (r['incident_id'], file_path)
+                    for file_path in r.get('file_paths') or []
+                )
+            execute_values(cur, f"""
+                INSERT INTO incidents (
+                    incident_id, app_user_id, {', '.join(_ANALYSIS_FIELDS)},
+                    detected_events, timestamp, location_id, real_files, status
+                ) VALUES %s;
+            """, incident_rows,
+                template="(" + ", ".join(["%s"] * (len(_ANALYSIS_FIELDS) + 6)) + ", 'pending')",
+                page_size=BULK_PAGE_SIZE)
+        
+            # 4. Media files
+            if media_rows:
+                execute_values(cur, """
+                    INSERT INTO media_files (incident_id, file_path) VALUES %s;
+                """, media_rows, page_size=BULK_PAGE_SIZE)
+        
+        logger.info("Bulk saved %s incident(s) with %s media file(s)", len(records), len(media_rows))
+        return len(records)
+        
+    except Exception as e:
+        logger.error("Error bulk saving AI analyses: %s", e)
+        raise
+
+
 def get_incident_by_id(incident_id: str) -> Optional[Dict]:
     """
     Retrieve incident data from database by incident_id
+    (only the columns the dashboard incident views render)
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            SELECT 
-                i.*,
-                l.address,
-                l.latitude,
-                l.longitude,
-                json_agg(
-                    json_build_object(
-                        'file_path', m.file_path,
-                        'media_type', m.media_type
-                    )
-                ) as media_files
-            FROM incidents i
-            LEFT JOIN locations l ON i.location_id = l.id
-            LEFT JOIN media_files m ON i.incident_id = m.incident_id
-            WHERE i.incident_id = %s
-            GROUP BY i.incident_id, l.id;
-        """, (incident_id,))
-        
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
-        
-        if row:
-            # Convert to dictionary (you may need to adjust column names)
-            return dict(row)
-        return None
+        with transaction(cursor_factory=RealDictCursor) as (conn, cur):
+            _execute_prepared(cur, """
+                SELECT 
+                    i.incident_id::text AS incident_id,
+                    i.category,
+                    i.title,
+                    i.description,
+                    i.severity,
+                    i.verified,
+                    i.violence_type,
+                    i.weapon,
+                    i.site_description,
+                    i.number_of_people,
+                    i.description_of_people,
+                    i.detailed_description_for_the_incident,
+                    i.accident_type,
+                    i.vehicles_machines_involved,
+                    i.utility_type,
+                    i.extent_of_impact,
+                    i.duration,
+                    i.illegal_type,
+                    i.items_involved,
+                    i.detected_events,
+                    i.timestamp,
+                    i.status,
+                    i.real_files,
+                    l.address,
+                    l.latitude,
+                    l.longitude
+                FROM incidents i
+                LEFT JOIN locations l ON i.location_id = l.id
+                WHERE i.incident_id = %s;
+            """, (incident_id,))
+            
+            row = cur.fetchone()
+        return row
         
     except Exception as e:
-        if conn:
-            conn.close()
-        logger.error(f"Error retrieving incident: {str(e)}")
+        logger.error("Error retrieving incident: %s", e)
         return None
 
 
@@ -280,146 +524,123 @@ def update_incident_status(incident_id: str, new_status: str) -> bool:
     
     Args:
         incident_id: UUID of the incident
-        new_status: New status value (pending, in_progress, resolved, etc.)
+        new_status: New status value (pending, accepted or rejected)
     
     Returns:
         True if successful, False otherwise
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            UPDATE incidents
-            SET status = %s
-            WHERE incident_id = %s;
-        """, (new_status, incident_id))
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        logger.info(f"✅ Updated incident {incident_id} status to {new_status}")
+        with transaction() as (conn, cur):
+            _execute_prepared(cur, """
+                UPDATE incidents
+                SET status = %s
+                WHERE incident_id = %s
+            """, (new_status, incident_id))
+            
+        logger.info("✅ Updated incident %s status to %s", incident_id, new_status)
         return True
         
     except Exception as e:
-        if conn:
-            conn.rollback()
-            conn.close()
-        logger.error(f"❌ Error updating incident status: {str(e)}")
+        logger.error("❌ Error updating incident status: %s", e)
         return False
 
 
-def get_all_incidents_from_db():
+def get_all_incidents_from_db(
+    limit: Optional[int] = None,
+    before_ts: Optional[datetime] = None,
+    before_id: Optional[str] = None
+):
     """
-    Get all incidents from database with location and media files
+    Get incidents from database with location and media files, newest first
+    
+    Args:
+        limit: Maximum number of incidents to return (None returns all)
+        before_ts, before_id: Keyset pagination cursor, pass the timestamp and
+            incident_id of the last incident of the previous page. Incidents
+            sharing a timestamp are ordered by incident_id, so none are skipped.
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            SELECT 
-                i.incident_id,
-                i.category,
-                i.title,
-                i.description,
-                i.severity,
-                i.timestamp,
-                i.status,
-                i.violence_type,
-                i.weapon,
-                i.site_description,
-                i.number_of_people,
-                i.description_of_people,
-                i.detailed_description_for_the_incident,
-                i.accident_type,
-                i.vehicles_machines_involved,
-                i.utility_type,
-                i.extent_of_impact,
-                i.duration,
-                i.illegal_type,
-                i.items_involved,
-                i.detected_events,
-                i.location_id,
-                i.real_files,
-                i.verified,
-                l.address,
-                l.latitude,
-                l.longitude,
-                COALESCE(
-                    json_agg(
-                        json_build_object(
-                            'file_path', m.file_path,
-                            'media_type', m.media_type
-                        )
-                    ) FILTER (WHERE m.id IS NOT NULL), 
-                    '[]'::json
-                ) as media_files,
-                u.device_id,
-                COALESCE(u.full_name, 'Anonymous User') as full_name,
-                u.national_id
-            FROM incidents i
-            LEFT JOIN locations l ON i.location_id = l.id
-            LEFT JOIN media_files m ON i.incident_id = m.incident_id
-            LEFT JOIN app_users u ON i.app_user_id = u.id
-            GROUP BY i.incident_id, l.id, u.id
-            ORDER BY i.timestamp DESC;
-        """)
-        
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        
-        incidents = []
-        incidents = []
-        for row in rows:
-            incidents.append({
-                'incident_id': str(row[0]),
-                'category': row[1],
-                'title': row[2],
-                'description': row[3],
-                'severity': row[4],
-                'timestamp': row[5].isoformat() if row[5] else None,
-                'status': row[6],
-                'violence_type': row[7],
-                'weapon': row[8],
-                'site_description': row[9],
-                'number_of_people': row[10],
-                'description_of_people': row[11],
-                'detailed_description_for_the_incident': row[12],
-                'accident_type': row[13],
-                'vehicles_machines_involved': row[14],
-                'utility_type': row[15],
-                'extent_of_impact': row[16],
-                'duration': row[17],
-                'illegal_type': row[18],
-                'items_involved': row[19],
-                'detected_events': row[20],
-                'location_id': row[21],
-                'real_files': row[22],
-                'verified': row[23],
-                'address': row[24],
-                'latitude': row[25],
-                'longitude': row[26],
-                'media_files': row[27] if row[27] is not None else [],
-                'device_id': row[28],
-                'user_name': row[29],
-                'national_id': row[30],
-                'is_anonymous': row[30] is None  # If no national_id, user is anonymous
-            })
-        
+        # Server-side cursor: rows are fetched in batches instead of buffering the whole result
+        # A page is a short indexed read; the full listing may take longer than the timeout
+        with transaction(name='incidents_stream', cursor_factory=RealDictCursor,
+                         long_running=limit is None) as (conn, cur):
+            cur.itersize = INCIDENTS_FETCH_BATCH
+            
+            cur.execute("""
+                SELECT 
+                    i.incident_id::text AS incident_id,
+                    i.category,
+                    i.title,
+                    i.description,
+                    i.severity,
+                    i.timestamp,
+                    i.status,
+                    i.violence_type,
+                    i.weapon,
+                    i.site_description,
+                    i.number_of_people,
+                    i.description_of_people,
+                    i.detailed_description_for_the_incident,
+                    i.accident_type,
+                    i.vehicles_machines_involved,
+                    i.utility_type,
+                    i.extent_of_impact,
+                    i.duration,
+                    i.illegal_type,
+                    i.items_involved,
+                    i.detected_events,
+                    i.location_id,
+                    i.real_files,
+                    i.verified,
+                    l.address,
+                    l.latitude,
+                    l.longitude,
+                    m.media_files,
+                    u.device_id,
+                    COALESCE(u.full_name, 'Anonymous User') as user_name,
+                    u.national_id
+                FROM incidents i
+                LEFT JOIN locations l ON i.location_id = l.id
+                LEFT JOIN LATERAL (
+                    SELECT COALESCE(
+                        json_agg(
+                            json_build_object(
+                                'file_path', mf.file_path,
+                                'media_type', mf.media_type
+                            )
+                        ),
+                        '[]'::json
+                    ) as media_files
+                    FROM media_files mf
+                    WHERE mf.incident_id = i.incident_id
+                ) m ON TRUE
+                LEFT JOIN app_users u ON i.app_user_id = u.id
+                WHERE %s::timestamp IS NULL
+                   OR (i.timestamp, i.incident_id) < (%s::timestamp, %s::uuid)
+                ORDER BY i.timestamp DESC, i.incident_id DESC
+                LIMIT %s;
+            """, (before_ts, before_ts, before_id, limit))
+            
+            incidents = []
+            for row in cur:
+                row['timestamp'] = row['timestamp'].isoformat() if row['timestamp'] else None
+                row['is_anonymous'] = row['national_id'] is None  # If no national_id, user is anonymous
+                incidents.append(row)
+            
         return incidents
         
     except Exception as e:
-        if conn:
-            conn.close()
-        logger.error(f"Error getting incidents from database: {str(e)}")
+        logger.error("Error getting incidents from database: %s", e)
         return []
 
 
+def count_incidents() -> int:
+    """Total number of incidents"""
+    with transaction() as (conn, cur):
+        cur.execute("SELECT count(*) FROM incidents")
+        return cur.fetchone()[0]
+
+
 def create_registered_user(national_id: str, full_name: str, contact_info: str, device_id: str) -> Optional[int]:
     """
     Create or update a registered user (not anonymous)
@@ -434,61 +655,53 @@ def create_registered_user(national_id: str, full_name: str, contact_info: str,
     Returns:
         User ID if successful, None otherwise
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Check if device already has a user
-        cur.execute("SELECT id, national_id FROM app_users WHERE device_id = %s;", (device_id,))
-        result = cur.fetchone()
-        
-        if result:
-            existing_id, existing_national_id = result
-            if existing_national_id is None:
-                # Update anonymous user (device_id only) to registered
-                cur.execute("""
-                    UPDATE app_users 
-                    SET national_id = %s, full_name = %s, contact_info = %s
-                    WHERE id = %s
-                    RETURNING id;
-                """, (national_id, full_name, contact_info, existing_id))
-                user_id = cur.fetchone()[0]
-                logger.info(f"Updated anonymous user to registered: device_id={device_id}, user_id={user_id}")
-            else:
-                # Already registered
-                user_id = existing_id
-                logger.info(f"User already registered: device_id={device_id}, user_id={user_id}")
-        else:
-            # Check if national_id already exists (user registering from new device)
-            cur.execute("SELECT id FROM app_users WHERE national_id = %s;", (national_id,))
+        with transaction() as (conn, cur):
+            # Register a new device, or upgrade its anonymous user, unless the national_id is taken
+            _execute_prepared(cur, """
+                INSERT INTO app_users (device_id, national_id, full_name, contact_info)
+                SELECT %s, %s, %s, %s
+                WHERE NOT EXISTS (SELECT 1 FROM app_users WHERE national_id = %s)
+                ON CONFLICT (device_id) DO UPDATE
+                SET national_id = EXCLUDED.national_id,
+                    full_name = EXCLUDED.full_name,
+                    contact_info = EXCLUDED.contact_info
+                WHERE app_users.national_id IS NULL
+                RETURNING id, (xmax = 0) AS inserted;
+            """, (device_id, national_id, full_name, contact_info, national_id))
             result = cur.fetchone()
             
             if result:
-                # Update existing user with new device_id
-                user_id = result[0]
-                cur.execute("UPDATE app_users SET device_id = %s WHERE id = %s;", (device_id, user_id))
-                logger.info(f"Updated device_id for existing user: user_id={user_id}")
+                user_id, inserted = result
+                if inserted:
+                    logger.info("Created new registered user: device_id=%s, user_id=%s", device_id, user_id)
+                else:
+                    logger.info("Updated anonymous user to registered: device_id=%s, user_id=%s", device_id, user_id)
             else:
-                # Create new registered user
-                cur.execute("""
-                    INSERT INTO app_users (device_id, national_id, full_name, contact_info)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id;
-                """, (device_id, national_id, full_name, contact_info))
-                user_id = cur.fetchone()[0]
-                logger.info(f"Created new registered user: device_id={device_id}, user_id={user_id}")
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+                cur.execute("SELECT id, national_id FROM app_users WHERE device_id = %s;", (device_id,))
+                result = cur.fetchone()
+                
+                if result and result[1] is not None:
+                    # Already registered
+                    user_id = result[0]
+                    logger.info("User already registered: device_id=%s, user_id=%s", device_id, user_id)
+                elif result:
+                    # Anonymous device, but the national_id belongs to another user
+                    raise ValueError(f"national_id is already registered to another device (device_id={device_id})")
+                else:
+                    # User registering from a new device: move the national_id's account to it
+                    cur.execute("""
+                        UPDATE app_users SET device_id = %s
+                        WHERE national_id = %s
+                        RETURNING id;
+                    """, (device_id, national_id))
+                    user_id = cur.fetchone()[0]
+                    logger.info("Updated device_id for existing user: user_id=%s", user_id)
+            
         return user_id
         
     except Exception as e:
-        if conn:
-            conn.rollback()
-            conn.close()
-        logger.error(f"Error creating registered user: {str(e)}")
+        logger.error("Error creating registered user: %s", e)
         logger.exception("Full traceback:")
         return None
 
@@ -0,0 +1,76 @@
+"""
+Import incidents from the legacy JSON store (data/incidents_data.json) into the database.
+
+Usage (from the backend/ folder):
+  python models/import_incidents_json.py [path/to/incidents.json]
+
+Incidents already in the database are skipped, so the script can be re-run.
+The rest are written with save_ai_analyses_bulk in a single transaction.
+"""
+
+import os
+import sys
+import json
+
+# Make sure we can import models.db_helper when running from repo root or backend/
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(CURRENT_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from models.db_helper import save_ai_analyses_bulk, transaction  # noqa: E402
+
+DEFAULT_JSON_FILE = os.path.join(BACKEND_DIR, "data", "incidents_data.json")
+
+
+def legacy_incident_to_record(incident: dict) -> dict:
+    """Convert an entry written by services.mobile.save_incident_to_json into a save_ai_analyses_bulk record"""
+    location = incident.get("location") or {}
+    details = incident.get("incident") or {}
+    file_paths = [
+        f["file_path"].replace("\\", "/")
+        for f in incident.get("files") or []
+        if f.get("file_path")
+    ]
+    description = details.get("description")
+    return {
+        "incident_id": incident["incident_id"],
+        "ai_analysis": {"description": description} if description not in (None, "null") else {},
+        "latitude": location.get("latitude"),
+        "longitude": location.get("longitude"),
+        "address": location.get("address"),
+        "timestamp": details.get("timestamp") or incident.get("timestamp_received"),
+        "file_paths": file_paths,
+        "device_id": incident.get("device_id") or "unknown",
+        "real_files": file_paths,
+    }
+
+
+def import_incidents(incidents: list) -> int:
+    """Save the incidents that are not in the database yet. Returns how many were imported."""
+    records = [legacy_incident_to_record(incident) for incident in incidents]
+    if not records:
+        return 0
+
+    with transaction() as (conn, cur):
+        cur.execute(
+            "SELECT incident_id::text FROM incidents WHERE incident_id = ANY(%s::uuid[])",
+            ([r["incident_id"] for r in records],)
+        )
+        existing = {row[0] for row in cur.fetchall()}
+
+    new_records = [r for r in records if r["incident_id"] not in existing]
+    return save_ai_analyses_bulk(new_records)
+
+
+def main():
+    json_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_JSON_FILE
+    with open(json_file, "r", encoding="utf-8") as f:
+        incidents = json.load(f)
+
+    imported = import_incidents(incidents)
+    print(f"✅ Imported {imported} of {len(incidents)} incident(s) from {json_file}")
+
+
+if __name__ == "__main__":
+    main()
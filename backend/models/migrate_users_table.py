@@ -42,11 +42,13 @@ def migrate_users_table():
             print("❌ Migration cancelled")
             return
         
-        cur.execute("DROP TABLE IF EXISTS app_users CASCADE;")
-        
+        # Drop and recreate in one round-trip. device_id and national_id
+        # lookups use the indexes behind their UNIQUE constraints, so no
+        # extra plain indexes are created (setup_db.py drops those too).
         cur.execute("""
+            DROP TABLE IF EXISTS app_users CASCADE;
             CREATE TABLE app_users (
-                id SERIAL PRIMARY KEY,
+                id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
                 device_id VARCHAR(255) UNIQUE NOT NULL,
                 national_id VARCHAR(50) UNIQUE,
                 full_name VARCHAR(255),
@@ -55,14 +57,6 @@ def migrate_users_table():
             );
         """)
         
-        # Recreate indexes
-        cur.execute("""
-            CREATE INDEX IF NOT EXISTS idx_app_users_device_id ON app_users(device_id);
-        """)
-        cur.execute("""
-            CREATE INDEX IF NOT EXISTS idx_app_users_national_id ON app_users(national_id);
-        """)
-        
         conn.commit()
         print("✅ Migration completed successfully!")
         print("📝 New schema:")
@@ -1,196 +1,279 @@
 import psycopg2
-from psycopg2 import sql
+from psycopg2 import errorcodes, sql
 import json
 from dotenv import load_dotenv
 import os
+import re
 import uuid
 from datetime import datetime
 
-def setup_database():
+# Connection settings setup_database() needs; .env is only read when the
+# environment (e.g. a container) does not already provide all of them
+DB_ENV_VARS = ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT")
+if not all(name in os.environ for name in DB_ENV_VARS):
     load_dotenv()
+
+# media_files.media_type is derived from the file extension by the database
+MEDIA_TYPE_EXPRESSION = """
+    CASE WHEN lower(substring(file_path from '[.][^./]*$'))
+              IN ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v')
+         THEN 'video' ELSE 'image' END
+"""
+
+# === SCHEMA ===
+# Built once at import. Every statement is idempotent, so the table DDL is
+# sent as one script and run in a single transaction (one round-trip).
+
+# App Users table (for mobile app - NO LOGIN REQUIRED)
+# device_id is the primary identifier (always present)
+# national_id, full_name, contact_info are NULL for anonymous users
+APP_USERS_DDL = """
+CREATE TABLE IF NOT EXISTS app_users (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    device_id VARCHAR(255) UNIQUE NOT NULL,
+    national_id VARCHAR(50) UNIQUE,
+    full_name VARCHAR(255),
+    contact_info VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Dashboard Users table (simple login for dashboard only)
+DASHBOARD_USERS_DDL = """
+CREATE TABLE IF NOT EXISTS dashboard_users (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    username VARCHAR(100) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    full_name VARCHAR(255) NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_login TIMESTAMP
+)
+"""
+
+# Locations table
+LOCATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS locations (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    address TEXT,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION
+)
+"""
+
+# Incidents table
+INCIDENTS_DDL = """
+CREATE TABLE IF NOT EXISTS incidents (
+    incident_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    app_user_id INT REFERENCES app_users(id) ON DELETE SET NULL,
+    category TEXT,
+    title TEXT,
+    description TEXT,
+    severity TEXT,
+    verified TEXT,
+    violence_type TEXT,
+    weapon TEXT,
+    site_description TEXT,
+    number_of_people INT,
+    description_of_people TEXT,
+    detailed_description_for_the_incident TEXT,
+    accident_type TEXT,
+    vehicles_machines_involved TEXT,
+    utility_type TEXT,
+    extent_of_impact TEXT,
+    duration TEXT,
+    illegal_type TEXT,
+    items_involved TEXT,
+    detected_events JSONB,
+    timestamp TIMESTAMP,
+    status TEXT DEFAULT 'pending'
+        CONSTRAINT ck_incidents_status CHECK (status IN ('pending', 'accepted', 'rejected')),
+    location_id INT REFERENCES locations(id) ON DELETE SET NULL,
+    real_files JSONB 
+)
+"""
+
+# Older setups created incident_id without a server-side default
+INCIDENTS_ID_DEFAULT_DDL = "ALTER TABLE incidents ALTER COLUMN incident_id SET DEFAULT gen_random_uuid()"
+
+# Older setups have no CHECK on incidents.status. NOT VALID skips the scan of
+# existing rows, new and updated rows are checked from now on
+INCIDENTS_STATUS_CHECK_DDL = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT FROM pg_constraint
+        WHERE conrelid = 'incidents'::regclass AND conname = 'ck_incidents_status'
+    ) THEN
+        ALTER TABLE incidents ADD CONSTRAINT ck_incidents_status
+        CHECK (status IN ('pending', 'accepted', 'rejected')) NOT VALID;
+    END IF;
+END
+$$
+"""
+
+# Media files table
+MEDIA_FILES_DDL = """
+CREATE TABLE IF NOT EXISTS media_files (
+    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    incident_id UUID REFERENCES incidents(incident_id) ON DELETE CASCADE,
+    file_path TEXT NOT NULL,
+    media_type TEXT GENERATED ALWAYS AS (""" + MEDIA_TYPE_EXPRESSION + """) STORED
+)
+"""
+
+# Older setups stored media_type as a plain column filled in by the application
+MEDIA_TYPE_MIGRATION_DDL = """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT FROM pg_attribute
+        WHERE attrelid = 'media_files'::regclass AND attname = 'media_type'
+          AND attgenerated = '' AND NOT attisdropped
+    ) THEN
+        RAISE NOTICE 'Converting media_files.media_type to a generated column';
+        ALTER TABLE media_files DROP COLUMN media_type;
+        ALTER TABLE media_files
+        ADD COLUMN media_type TEXT GENERATED ALWAYS AS (""" + MEDIA_TYPE_EXPRESSION + """) STORED;
+    END IF;
+END
+$$
+"""
+
+SCHEMA_DDL = ";\n".join((
+    APP_USERS_DDL,
+    DASHBOARD_USERS_DDL,
+    LOCATIONS_DDL,
+    INCIDENTS_DDL,
+    INCIDENTS_ID_DEFAULT_DDL,
+    INCIDENTS_STATUS_CHECK_DDL,
+    MEDIA_FILES_DDL,
+    MEDIA_TYPE_MIGRATION_DDL,
+)) + ";"
+
+# Indexes are built after the seed data, one statement at a time
+# (CONCURRENTLY cannot run inside a transaction or multi-statement script)
+INDEX_DDL = (
+    # device_id and national_id lookups use the indexes behind their UNIQUE
+    # constraints; drop the duplicate plain indexes older setups created
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_app_users_device_id",
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_app_users_national_id",
+    # username lookups use the index behind its UNIQUE constraint
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_dashboard_users_username",
+    # Newest-first incident listing and keyset pagination on (timestamp, incident_id);
+    # replaces the timestamp-only index older setups created
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_incidents_timestamp_id ON incidents(timestamp DESC, incident_id DESC)",
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_incidents_timestamp",
+    # GiST index on a native point so "incidents near me" queries
+    # (point(longitude, latitude) <@ circle(...)) don't need a seq scan
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_locations_point_gist ON locations USING gist (point(longitude, latitude))",
+    # Per-incident media lookups
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_media_files_incident_id ON media_files(incident_id)",
+)
+
+# Tables that INDEX_DDL builds indexes on (checked for invalid leftovers)
+INDEXED_TABLES = tuple(sorted({
+    match.group(1) for match in (re.search(r" ON (\w+)", stmt) for stmt in INDEX_DDL) if match
+}))
+
+# bcrypt hash (cost 12, the services' BCRYPT_ROUNDS default) of the default
+# admin password "Admin@123", which should be changed on first login
+DEFAULT_ADMIN_PASSWORD_HASH = "$2b$12$ra8vs1zU2z1ZOyuJAasc7e.MRb9DjCPB9rpxhw9TpI.n3bUYDpUdC"
+
+def setup_database():
     DB_NAME = os.getenv("DB_NAME")
     DB_USER = os.getenv("DB_USER")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
     DB_HOST = os.getenv("DB_HOST")
     DB_PORT = os.getenv("DB_PORT")
 
-    # === 1️⃣ CONNECT TO POSTGRES DEFAULT DATABASE ===
-    # Connect to the default 'postgres' database first to create our target database
-    conn = psycopg2.connect(
-        dbname="postgres",  # Connect to default postgres database
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT
-    )
-    conn.autocommit = True
-    cur = conn.cursor()
+    def connect(dbname):
+        return psycopg2.connect(
+            dbname=dbname,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
 
-    # === 2️⃣ CHECK IF DATABASE EXISTS ===
-    cur.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (DB_NAME,))
-    exists = cur.fetchone()
+    # === 1️⃣ CONNECT TO YOUR DATABASE ===
+    # Usually it already exists, so only one connection is opened
+    try:
+        conn = connect(DB_NAME)
+        print(f"✅ Database '{DB_NAME}' already exists.")
+    except psycopg2.OperationalError as e:
+        if getattr(e, "pgcode", None) != errorcodes.INVALID_CATALOG_NAME and "does not exist" not in str(e):
+            raise
 
-    if not exists:
+        # === 2️⃣ CREATE IT FROM THE DEFAULT 'postgres' DATABASE ===
         print(f"📦 Database '{DB_NAME}' not found. Creating it...")
-        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(DB_NAME)))
-    else:
-        print(f"✅ Database '{DB_NAME}' already exists.")
+        admin_conn = connect("postgres")
+        admin_conn.autocommit = True
+        try:
+            with admin_conn.cursor() as admin_cur:
+                admin_cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(DB_NAME)))
+        finally:
+            admin_conn.close()
 
-    cur.close()
-    conn.close()
+        # === 3️⃣ CONNECT TO THE NEW DATABASE ===
+        conn = connect(DB_NAME)
 
-    # === 3️⃣ CONNECT TO YOUR DATABASE ===
-    conn = psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT
-    )
-    conn.autocommit = True
     cur = conn.cursor()
 
-    # === 4️⃣ FUNCTION TO CHECK AND CREATE TABLES ===
-    def create_table_if_not_exists(name, create_sql):
-        cur.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = %s
-            );
-        """, (name,))
-        exists = cur.fetchone()[0]
-
-        if not exists:
-            print(f"🧱 Creating table '{name}'...")
-            cur.execute(create_sql)
-        else:
-            print(f"✅ Table '{name}' already exists.")
-
-    # === 5️⃣ CREATE TABLES ===
-
-    # App Users table (for mobile app - NO LOGIN REQUIRED)
-    # device_id is the primary identifier (always present)
-    # national_id, full_name, contact_info are NULL for anonymous users
-    create_table_if_not_exists("app_users", """
-    CREATE TABLE app_users (
-        id SERIAL PRIMARY KEY,
-        device_id VARCHAR(255) UNIQUE NOT NULL,
-        national_id VARCHAR(50) UNIQUE,
-        full_name VARCHAR(255),
-        contact_info VARCHAR(255),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """)
-    
-    # Create indexes for app_users table
-    cur.execute("""
-        CREATE INDEX IF NOT EXISTS idx_app_users_device_id ON app_users(device_id);
-    """)
-    cur.execute("""
-        CREATE INDEX IF NOT EXISTS idx_app_users_national_id ON app_users(national_id);
-    """)
-    
-    # Dashboard Users table (simple login for dashboard only)
-    create_table_if_not_exists("dashboard_users", """
-    CREATE TABLE dashboard_users (
-        id SERIAL PRIMARY KEY,
-        username VARCHAR(100) UNIQUE NOT NULL,
-        password_hash VARCHAR(255) NOT NULL,
-        full_name VARCHAR(255) NOT NULL,
-        is_active BOOLEAN DEFAULT TRUE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        last_login TIMESTAMP
-    );
-    """)
-    
-    # Create index for dashboard_users
-    cur.execute("""
-        CREATE INDEX IF NOT EXISTS idx_dashboard_users_username ON dashboard_users(username);
-    """)
-
-    # Locations table
-    create_table_if_not_exists("locations", """
-    CREATE TABLE locations (
-        id SERIAL PRIMARY KEY,
-        address TEXT,
-        latitude DOUBLE PRECISION,
-        longitude DOUBLE PRECISION
-    );
-    """)
-
-    # Incidents table
-    create_table_if_not_exists("incidents", """
-    CREATE TABLE incidents (
-        incident_id UUID PRIMARY KEY,
-        app_user_id INT REFERENCES app_users(id) ON DELETE SET NULL,
-        category TEXT,
-        title TEXT,
-        description TEXT,
-        severity TEXT,
-        verified TEXT,
-        violence_type TEXT,
-        weapon TEXT,
-        site_description TEXT,
-        number_of_people INT,
-        description_of_people TEXT,
-        detailed_description_for_the_incident TEXT,
-        accident_type TEXT,
-        vehicles_machines_involved TEXT,
-        utility_type TEXT,
-        extent_of_impact TEXT,
-        duration TEXT,
-        illegal_type TEXT,
-        items_involved TEXT,
-        detected_events JSONB,
-        timestamp TIMESTAMP,
-        status TEXT DEFAULT 'pending',
-        location_id INT REFERENCES locations(id) ON DELETE SET NULL,
-        real_files JSONB 
-    );
-    """)
-
-    # Media files table
-    create_table_if_not_exists("media_files", """
-    CREATE TABLE media_files (
-        id SERIAL PRIMARY KEY,
-        incident_id UUID REFERENCES incidents(incident_id) ON DELETE CASCADE,
-        file_path TEXT NOT NULL,
-        media_type TEXT DEFAULT 'video'
-    );
-    """)
-
-    # === 6️⃣ CREATE DEFAULT DASHBOARD USER (if not exists) ===
+    # === 4️⃣ CREATE TABLES ===
+    # Indexes are built separately once the seed data is in (step 6)
+    print("🧱 Creating missing tables...")
+    with conn:
+        cur.execute(SCHEMA_DDL)
+    # Report migrations, not the "already exists, skipping" noise
+    for notice in conn.notices:
+        if not notice.rstrip().endswith("skipping"):
+            print(f"🔧 {notice.strip()}")
+    print("✅ Tables are in place.")
+
+    # === 5️⃣ CREATE DEFAULT DASHBOARD USER (if not exists) ===
+    # Precomputed hash: no password hashing on startup, and the insert is
+    # skipped by ON CONFLICT when the admin already exists
     cur.execute("""
-        SELECT EXISTS (
-            SELECT FROM dashboard_users 
-            WHERE username = 'admin'
-        );
-    """)
-    admin_exists = cur.fetchone()[0]
+        INSERT INTO dashboard_users (username, password_hash, full_name, is_active)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (username) DO NOTHING
+        RETURNING id;
+    """, (
+        'admin',
+        DEFAULT_ADMIN_PASSWORD_HASH,
+        'System Administrator',
+        True
+    ))
     
-    if not admin_exists:
-        print("👤 Creating default dashboard user...")
-        # Default password: Admin@123 (should be changed on first login)
-        try:
-            from werkzeug.security import generate_password_hash
-            default_password_hash = generate_password_hash("Admin@123")
-        except ImportError:
-            import hashlib
-            default_password_hash = hashlib.sha256("Admin@123".encode()).hexdigest()
-        
-        cur.execute("""
-            INSERT INTO dashboard_users (username, password_hash, full_name, is_active)
-            VALUES (%s, %s, %s, %s);
-        """, (
-            'admin',
-            default_password_hash,
-            'System Administrator',
-            True
-        ))
+    if cur.fetchone():
         print("✅ Default dashboard user created (username: admin, password: Admin@123)")
         print("⚠️  Please change the default password after first login!")
     else:
         print("✅ Dashboard admin user already exists.")
+    conn.commit()
+
+    # === 6️⃣ CREATE INDEXES ===
+    # CONCURRENTLY keeps an existing, populated table writable while an index
+    # is built; it cannot run inside a transaction, hence autocommit
+    conn.autocommit = True
+
+    # A failed concurrent build leaves an INVALID index behind that
+    # IF NOT EXISTS would skip, so drop those first to rebuild them
+    cur.execute("""
+        SELECT c.relname FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid
+          AND i.indrelid = ANY(%s::regclass[]);
+    """, (list(INDEXED_TABLES),))
+    for (index_name,) in cur.fetchall():
+        print(f"🔧 Rebuilding invalid index '{index_name}'...")
+        cur.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(index_name)))
+
+    print("🗂️  Creating missing indexes...")
+    for stmt in INDEX_DDL:
+        cur.execute(stmt)
+    print("✅ Indexes are in place.")
 
     cur.close()
     conn.close()
@@ -2,16 +2,29 @@
 Simplified Database Models
 - app_users: Mobile users (NO LOGIN)
 - dashboard_users: Dashboard users (simple login)
+
+The schema itself is created by models/setup_db.py; these classes only map
+onto it and must match its DDL.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import create_engine, CheckConstraint, Column, Computed, Index, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
-from datetime import datetime
 import os
+import sys
 from dotenv import load_dotenv
 
-load_dotenv()
+# Make sure we can import models.setup_db when running this file directly
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from models.setup_db import DB_ENV_VARS, MEDIA_TYPE_EXPRESSION, setup_database  # noqa: E402
+
+# Skip reading .env when the connection settings are already in the environment
+if "DATABASE_URL" not in os.environ and not all(name in os.environ for name in DB_ENV_VARS):
+    load_dotenv()
 
 Base = declarative_base()
 
@@ -22,12 +35,13 @@ class AppUser(Base):
     """Mobile app users - NO LOGIN REQUIRED"""
     __tablename__ = "app_users"
     
-    id = Column(Integer, primary_key=True, index=True)
-    national_id = Column(String(50), unique=True, nullable=False, index=True)
-    full_name = Column(String(255), nullable=False)
-    contact_info = Column(String(255), nullable=False)  # Phone or email
-    device_id = Column(String(255), index=True)  # For auto-linking
-    created_at = Column(DateTime, default=datetime.utcnow)
+    id = Column(Integer, primary_key=True)
+    device_id = Column(String(255), unique=True, nullable=False)  # Primary identifier
+    # NULL for anonymous users
+    national_id = Column(String(50), unique=True)
+    full_name = Column(String(255))
+    contact_info = Column(String(255))  # Phone or email
+    created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
     incidents = relationship("Incident", back_populates="reporter")
@@ -39,12 +53,12 @@ class DashboardUser(Base):
     """Dashboard users - all can approve/reject incidents"""
     __tablename__ = "dashboard_users"
     
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String(100), unique=True, nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    username = Column(String(100), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=False)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    is_active = Column(Boolean, server_default=text("TRUE"))
+    created_at = Column(DateTime, server_default=func.now())
     last_login = Column(DateTime)
 
 
@@ -53,38 +67,43 @@ class DashboardUser(Base):
 class Location(Base):
     __tablename__ = "locations"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     address = Column(Text)
-    latitude = Column(Float, nullable=False)
-    longitude = Column(Float, nullable=False)
+    latitude = Column(Float)
+    longitude = Column(Float)
     
     # Relationships
     incidents = relationship("Incident", back_populates="location")
 
+# GiST index on a native point for radius and bounding-box queries
+Index("idx_locations_point_gist", func.point(Location.longitude, Location.latitude), postgresql_using="gist")
+
 
 # ============ INCIDENTS ============
 
 class Incident(Base):
     __tablename__ = "incidents"
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'accepted', 'rejected')", name="ck_incidents_status"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    incident_id = Column(String(100), unique=True, nullable=False, index=True)  # UUID
+    incident_id = Column(UUID(as_uuid=False), primary_key=True, server_default=func.gen_random_uuid())
     
     # Reporter (can be NULL for anonymous)
-    app_user_id = Column(Integer, ForeignKey("app_users.id"), nullable=True)
+    app_user_id = Column(Integer, ForeignKey("app_users.id", ondelete="SET NULL"))
     
     # Location
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="SET NULL"))
     
     # Basic info
-    category = Column(String(100))
-    title = Column(String(500))
+    category = Column(Text)
+    title = Column(Text)
     description = Column(Text)
     
-    # Status (pending, approved, rejected)
-    status = Column(String(50), default="pending")
-    verified = Column(String(50))
-    severity = Column(String(50))
+    # Status (pending, accepted, rejected)
+    status = Column(Text, server_default="pending")
+    verified = Column(Text)
+    severity = Column(Text)
     
     # Incident details (from AI analysis)
     violence_type = Column(Text)
@@ -100,16 +119,16 @@ class Incident(Base):
     duration = Column(Text)
     illegal_type = Column(Text)
     items_involved = Column(Text)
-    detected_events = Column(JSON)
+    detected_events = Column(JSONB)
+    real_files = Column(JSONB)
     
-    # Timestamps
-    timestamp = Column(DateTime, nullable=False)  # When incident occurred
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # When the incident occurred
+    timestamp = Column(DateTime)
     
     # Relationships
     reporter = relationship("AppUser", back_populates="incidents")
     location = relationship("Location", back_populates="incidents")
-    media_files = relationship("MediaFile", back_populates="incident", cascade="all, delete-orphan")
+    media_files = relationship("MediaFile", back_populates="incident", passive_deletes=True)
 
 
 # ============ MEDIA FILES ============
@@ -117,13 +136,11 @@ class Incident(Base):
 class MediaFile(Base):
     __tablename__ = "media_files"
     
-    id = Column(Integer, primary_key=True, index=True)
-    incident_id = Column(String(100), ForeignKey("incidents.incident_id"), nullable=False)
-    
-    file_path = Column(String(1000), nullable=False)
-    media_type = Column(String(50), default="video")  # photo, video
+    id = Column(Integer, primary_key=True)
+    incident_id = Column(UUID(as_uuid=False), ForeignKey("incidents.incident_id", ondelete="CASCADE"))
     
-    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    file_path = Column(Text, nullable=False)
+    media_type = Column(Text, Computed(MEDIA_TYPE_EXPRESSION, persisted=True))  # image, video
     
     # Relationships
     incident = relationship("Incident", back_populates="media_files")
@@ -140,7 +157,25 @@ if not DATABASE_URL:
     DB_PORT = os.getenv("DB_PORT", "5432")
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Same pool limits as models/db_helper.py: DB_POOL_MIN connections are kept
+# open, overflow connections up to DB_POOL_MAX are closed when returned
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+DB_POOL_MIN = min(int(os.getenv("DB_POOL_MIN", str(DB_POOL_MAX))), DB_POOL_MAX)
+
+engine = create_engine(
+    DATABASE_URL,
+    echo=os.getenv("SQL_ECHO") == "1",  # Set SQL_ECHO=1 to log every statement
+    pool_size=DB_POOL_MIN,
+    max_overflow=max(DB_POOL_MAX - DB_POOL_MIN, 0),
+    pool_timeout=10,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    # Multi-row INSERTs go out as INSERT ... VALUES pages (same page size as
+    # db_helper's BULK_PAGE_SIZE); UPDATE/DELETE executemany uses execute_batch
+    insertmanyvalues_page_size=1000,
+    executemany_mode="values_plus_batch",
+    executemany_batch_page_size=500
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -154,9 +189,8 @@ def get_db():
 
 
 def init_db():
-    """Create all tables (use setup_db.py instead for proper setup)"""
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully!")
+    """Create all tables (delegates to setup_db.py, the single source of the schema)"""
+    setup_database()
 
 
 if __name__ == "__main__":
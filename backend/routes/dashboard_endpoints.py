@@ -1,19 +1,49 @@
 from pydantic import BaseModel, Field, validator
 from fastapi import APIRouter, HTTPException, Response, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
+from starlette.datastructures import Headers
+from fastapi.concurrency import run_in_threadpool
 from services.dashboard import (
     get_incidents_summary_service, 
     get_incident_by_id_service, 
     update_incident_status_service,
-    manage_users_service
+    manage_users_service,
+    edit_dashboard_user_service,
+    delete_dashboard_user_service,
+    create_dashboard_user_service
 )
-from typing import Optional
+from services.auth import authenticate_dashboard_user
+from typing import Dict, Optional
+from enum import Enum
 import re
 import os
+import time
 import hashlib
+import anyio
+import orjson
+from urllib.parse import quote
 
 # Create router for dashboard endpoints
-dashboard_router = APIRouter()
+dashboard_router = APIRouter(default_response_class=ORJSONResponse)
+
+# Let nginx (X-Accel-Redirect) or Apache (X-Sendfile) stream incident files
+USE_X_ACCEL = os.getenv("USE_X_ACCEL", "").lower() in ("1", "true", "yes")
+USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
+X_ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "/_protected/")
+# Directory the X_ACCEL_PREFIX location is aliased to
+MEDIA_DATA_ROOT = os.getenv("MEDIA_DATA_ROOT", "data")
+
+# Resolved media files per incident: {incident_id: (expires_at, {kind: file_map})}
+# A dashboard page loads many files of the same incident in a burst
+INCIDENT_CACHE_TTL_SECONDS = 60
+INCIDENT_CACHE_MAX_SIZE = 512
+_incident_cache: Dict[str, tuple] = {}
+
+# Incident media is never rewritten, clients may keep it for 7 days
+MEDIA_CACHE_CONTROL = "public, max-age=604800, immutable"
+
+# Incident images by extension, anything else is sent as JPEG
+IMAGE_MEDIA_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
 
 # Request models
 class LoginRequest(BaseModel):
@@ -26,14 +56,16 @@ class VideoRequest(BaseModel):
 class ImageRequest(BaseModel):
     image_path: str
 
+class IncidentStatus(str, Enum):
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+
 class StatusUpdateRequest(BaseModel):
-    status: str
+    status: IncidentStatus
     
-    @validator('status')
-    def validate_status(cls, v):
-        if v.lower() not in ['accepted', 'rejected']:
-            raise ValueError('Status must be either "accepted" or "rejected"')
-        return v.lower()
+    @validator('status', pre=True)
+    def lowercase_status(cls, v):
+        return v.lower() if isinstance(v, str) else v
 
 # Edit user request model
 class EditUserRequest(BaseModel):
@@ -43,7 +75,6 @@ class EditUserRequest(BaseModel):
 # Login endpoint
 @dashboard_router.post("/login")
 async def login_dashboard_user(request: LoginRequest):
-    from services.auth import authenticate_dashboard_user
     result = await authenticate_dashboard_user(request.username, request.password)
     if result["status"] == "error":
         raise HTTPException(status_code=401, detail=result["message"])
@@ -52,8 +83,8 @@ async def login_dashboard_user(request: LoginRequest):
 # Edit user endpoint
 @dashboard_router.put("/users/{user_id}")
 async def edit_dashboard_user(user_id: int, request: EditUserRequest):
-    from services.dashboard import edit_dashboard_user_service
-    result = edit_dashboard_user_service(user_id, request.full_name, request.password)
+    # Password hashing is CPU-bound, run it in the threadpool
+    result = await run_in_threadpool(edit_dashboard_user_service, user_id, request.full_name, request.password)
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
     return result
@@ -61,41 +92,140 @@ async def edit_dashboard_user(user_id: int, request: EditUserRequest):
 # Delete user endpoint
 @dashboard_router.delete("/users/{user_id}")
 async def delete_dashboard_user(user_id: int):
-    from services.dashboard import delete_dashboard_user_service
-    result = delete_dashboard_user_service(user_id)
+    result = await run_in_threadpool(delete_dashboard_user_service, user_id)
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
-def get_file_etag(file_path: str) -> str:
-    """Generate ETag for caching"""
-    try:
-        file_stat = os.stat(file_path)
-        return hashlib.md5(f"{file_path}{file_stat.st_mtime}".encode()).hexdigest()
-    except:
-        return hashlib.md5(file_path.encode()).hexdigest()
+class _RangeNotSatisfiable(Exception):
+    """The Range header asks only for bytes past the end of the file"""
+
+
+def _parse_byte_range(range_header: Optional[str], size: int) -> Optional[tuple]:
+    """
+    Parse a single "bytes=start-end" Range header into (offset, count).
+    Returns None when there is no usable header (the whole file is sent) and
+    raises _RangeNotSatisfiable when none of the requested bytes exist.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (range_header or "").strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        suffix = int(end)
+        if suffix == 0 or size == 0:
+            raise _RangeNotSatisfiable()
+        offset = max(size - suffix, 0)
+        return offset, size - offset
+    offset = int(start)
+    if end and int(end) < offset:
+        return None  # Invalid range, ignored
+    if offset >= size:
+        raise _RangeNotSatisfiable()
+    last = min(int(end), size - 1) if end else size - 1
+    return offset, last - offset + 1
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that answers single byte-range requests (206, or 416 when
+    unsatisfiable) and hands the open file descriptor to the server when it
+    supports the ASGI "http.response.zerocopysend" extension, so the bytes are
+    sent by the kernel (sendfile) without passing through Python.
+    Otherwise the requested bytes are streamed in chunks.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        file_stat = self.stat_result
+        if file_stat is None:
+            file_stat = await run_in_threadpool(os.stat, self.path)
+            self.set_stat_headers(file_stat)
+        size = file_stat.st_size
+        offset, count, status_code = 0, size, self.status_code
+
+        try:
+            byte_range = _parse_byte_range(Headers(scope=scope).get("range"), size)
+        except _RangeNotSatisfiable:
+            response = Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+            await response(scope, receive, send)
+            return
+        if byte_range:
+            offset, count = byte_range
+            status_code = 206
+            self.headers["content-range"] = f"bytes {offset}-{offset + count - 1}/{size}"
+        self.headers["content-length"] = str(count)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in scope.get("extensions", {}):
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                })
+            finally:
+                os.close(fd)
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(offset)
+                remaining = count
+                more_body = True
+                while more_body:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    remaining -= len(chunk)
+                    more_body = remaining > 0 and len(chunk) > 0
+                    await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if self.background is not None:
+            await self.background()
+
+def get_file_etag(incident_id: str, requested_path: str) -> str:
+    """
+    Generate ETag for caching. Incident media is immutable, so the tag only
+    names the file: it can be checked before any database or disk access.
+    """
+    digest = hashlib.blake2b(f"{incident_id}:{requested_path}".encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def _is_not_modified(req: Request, etag: str) -> bool:
+    """
+    True if the client's If-None-Match names this ETag. "*" only means the
+    file exists, so it is not matched here and the request takes the normal
+    lookup (404 for unknown incidents or files)
+    """
+    if_none_match = req.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+# The root payload never changes, so it is serialized once at import time
+DASHBOARD_ROOT_RESPONSE_BYTES = orjson.dumps({
+    "message": "Dashboard API endpoints",
+    "status": "Active",
+    "available_endpoints": [
+        "GET /api/dashboard/ - This endpoint",
+        "GET /api/dashboard/users - Get users summary",
+        "GET /api/dashboard/incidents - Get incidents summary",
+        "GET /api/dashboard/incident/{incident_id} - Get detailed incident information",
+        "POST /api/dashboard/incident/{incident_id}/video - Serve video file (body: {file_path})",
+        "POST /api/dashboard/incident/{incident_id}/image - Serve image file (body: {image_path})",
+        "POST /api/dashboard/incident/{incident_id}/status - Update incident status (body: {status})"
+    ]
+})
 
 @dashboard_router.get("/")
 async def dashboard_root():
     """Dashboard root endpoint"""
-    return {
-        "message": "Dashboard API endpoints",
-        "status": "Active",
-        "available_endpoints": [
-            "GET /api/dashboard/ - This endpoint",
-            "GET /api/dashboard/users - Get users summary",
-            "GET /api/dashboard/incidents - Get incidents summary",
-            "GET /api/dashboard/incident/{incident_id} - Get detailed incident information",
-            "POST /api/dashboard/incident/{incident_id}/video - Serve video file (body: {file_path})",
-            "POST /api/dashboard/incident/{incident_id}/image - Serve image file (body: {image_path})",
-            "POST /api/dashboard/incident/{incident_id}/status - Update incident status (body: {status})"
-        ]
-    }
+    return Response(content=DASHBOARD_ROOT_RESPONSE_BYTES, media_type="application/json")
 
 @dashboard_router.get("/users")
 async def get_users():
     """Get summary of system users"""
-    users_data = manage_users_service()
+    users_data = await run_in_threadpool(manage_users_service)
     if users_data["status"] == "error":
         raise HTTPException(status_code=500, detail=users_data["message"])
     return users_data
@@ -110,7 +240,7 @@ async def get_incidents_summary():
         - category, title, description, severity, verified
         - incident_id, timestamp, status, location
     """
-    return get_incidents_summary_service()
+    return await run_in_threadpool(get_incidents_summary_service)
 
 # Request model for creating a user
 class CreateUserRequest(BaseModel):
@@ -128,8 +258,7 @@ async def create_dashboard_user(request: CreateUserRequest):
             "Password is too weak. It must be at least 8 characters and include at least one uppercase letter, "
             "one lowercase letter, one number, and one special character."
         ))
-    from services.dashboard import create_dashboard_user_service
-    result = create_dashboard_user_service(request.username, request.full_name, request.password)
+    result = await run_in_threadpool(create_dashboard_user_service, request.username, request.full_name, request.password)
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
     return result
@@ -150,76 +279,174 @@ async def get_incident_by_id(incident_id: str):
         - location and timestamp information
         - real_files paths
     """
-    return get_incident_by_id_service(incident_id)
+    return await run_in_threadpool(get_incident_by_id_service, incident_id)
 
 
-@dashboard_router.post("/incident/{incident_id}/video")
-async def serve_incident_video(incident_id: str, request: VideoRequest, req: Request):
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _locate_file(path: str) -> Optional[tuple]:
     """
-    Serve video file associated with an incident
+    (path, stat_result) of a stored path on disk, or None when it is missing.
+    Stored paths may be relative to the backend folder or to data/.
+    """
+    for candidate in (path, "data/" + path):
+        file_stat = _stat_or_none(candidate)
+        if file_stat is not None:
+            return candidate, file_stat
+    return None
+
+
+def _build_file_map(stored_paths) -> Dict[str, tuple]:
+    """
+    Map each stored path (normalized) and its file name to
+    (stored_path, found), where found is _locate_file's result
+    """
+    file_map = {}
+    for path in stored_paths:
+        path = path.replace("\\", "/")
+        entry = (path, _locate_file(path))
+        file_map.setdefault(os.path.basename(path), entry)
+        file_map[path] = entry
+    return file_map
+
+
+def _get_incident_files(incident_id: str) -> Dict[str, dict]:
+    """Resolved "video" and "image" file maps of an incident, cached briefly"""
+    now = time.monotonic()
+    cached = _incident_cache.get(incident_id)
+    if cached and cached[0] > now:
+        return cached[1]
     
-    Args:
-        incident_id: The unique incident identifier
-        request: VideoRequest containing file_path
-        
-    Returns:
-        Video file as FileResponse
+    # Raises 404 for unknown incidents, which are not cached
+    incident_info = get_incident_by_id_service(incident_id).get("incident_info", {})
+    files = {
+        "video": _build_file_map(incident_info.get("real_files") or []),
+        "image": _build_file_map(
+            path
+            for event in incident_info.get("detected_events") or []
+            for path in (event.get("image_path"), *(event.get("detected_elements_paths") or []))
+            if path
+        ),
+    }
+    if len(_incident_cache) >= INCIDENT_CACHE_MAX_SIZE:
+        _incident_cache.clear()
+    _incident_cache[incident_id] = (now + INCIDENT_CACHE_TTL_SECONDS, files)
+    return files
+
+
+def _resolve_incident_file(incident_id: str, requested_path: str, kind: str) -> tuple:
+    """
+    Find the file on disk for a path that belongs to the incident
+    (kind "video": one of its real_files, kind "image": a detected event image)
+    and return it with its stat_result. Raises 404 when the path is not part of the incident or is missing on disk.
     """
     # Get incident data to verify the file belongs to this incident
-    incident_data = get_incident_by_id_service(incident_id)
+    file_map = _get_incident_files(incident_id)[kind]
     
-    # Normalize the requested path
-    requested_path = request.file_path.replace("\\", "/")
+    requested = requested_path.replace("\\", "/")
+    key = requested if requested in file_map else os.path.basename(requested)
+    if key not in file_map:
+        raise HTTPException(status_code=404, detail=f"{kind.capitalize()} file {requested_path} not found for incident {incident_id}")
     
-    # Check if the requested file path exists in the incident's real_files
-    video_found = False
-    actual_file_path = None
-    
-    for real_file in incident_data.get("incident_info", {}).get("real_files", []):
-        # Normalize stored path
-        stored_path = real_file.replace("\\", "/")
-        
-        # Check if the requested path matches the stored path
-        if requested_path == stored_path or requested_path in stored_path:
-            # Try different path variations to find the actual file
-            if os.path.exists(stored_path):
-                actual_file_path = stored_path
-                video_found = True
-                break
-            elif os.path.exists("data/" + stored_path):
-                actual_file_path = "data/" + stored_path
-                video_found = True
-                break
-            elif not stored_path.startswith("data/") and os.path.exists(stored_path):
-                actual_file_path = stored_path
-                video_found = True
-                break
+    stored_path, actual_file = file_map[key]
+    if actual_file is None:
+        # Missing files are not cached: the upload may have landed since
+        actual_file = _locate_file(stored_path)
+        if actual_file is None:
+            raise HTTPException(status_code=404, detail=f"{kind.capitalize()} file not found on server")
+        file_map[key] = (stored_path, actual_file)
+    return actual_file
+
+
+def _file_response(file_path: str, media_type: str, headers: dict, stat_result: Optional[os.stat_result] = None) -> Response:
+    """
+    Send an incident file. With USE_X_ACCEL (nginx) or USE_X_SENDFILE (Apache)
+    the server in front of the API streams the file and the worker returns at
+    once; otherwise the API sends it itself.
+
+    Matching nginx location for USE_X_ACCEL (X_ACCEL_PREFIX defaults to /_protected/):
+
+        location /_protected/ {
+            internal;
+            alias /path/to/backend/data/;
+            sendfile on;
+            tcp_nopush on;
+        }
+    """
+    # Only files under MEDIA_DATA_ROOT are reachable through the web server's
+    # mapping, anything stored elsewhere is sent by the API itself
+    data_root = os.path.abspath(MEDIA_DATA_ROOT)
+    abs_path = os.path.abspath(file_path)
+    try:
+        offload = os.path.commonpath([data_root, abs_path]) == data_root
+    except ValueError:
+        offload = False  # Different drives on Windows
+    if USE_X_ACCEL and offload:
+        rel_path = os.path.relpath(abs_path, data_root).replace(os.sep, "/")
+        return Response(
+            status_code=200,
+            media_type=media_type,
+            headers={**headers, "X-Accel-Redirect": X_ACCEL_PREFIX + quote(rel_path)},
+        )
+    if USE_X_SENDFILE and offload:
+        return Response(
+            status_code=200,
+            media_type=media_type,
+            headers={**headers, "X-Sendfile": abs_path},
+        )
+    return ZeroCopyFileResponse(
+        path=file_path,
+        media_type=media_type,
+        filename=os.path.basename(file_path),
+        headers=headers,
+        stat_result=stat_result,
+    )
+
+
+async def _serve_incident_file(req: Request, incident_id: str, requested_path: str, kind: str) -> Response:
+    """Shared body of the video and image endpoints."""
+    headers = {"Cache-Control": MEDIA_CACHE_CONTROL}
     
-    if not video_found:
-        raise HTTPException(status_code=404, detail=f"Video file {request.file_path} not found for incident {incident_id}")
+    # Check if client has cached version before looking anything up
+    etag = get_file_etag(incident_id, requested_path)
+    headers["ETag"] = etag
+    if _is_not_modified(req, etag):
+        return Response(status_code=304, headers=headers)
     
-    if not actual_file_path or not os.path.exists(actual_file_path):
-        raise HTTPException(status_code=404, detail="Video file not found on server")
+    # Incident lookup and file probing block, keep them off the event loop
+    file_path, file_stat = await run_in_threadpool(_resolve_incident_file, incident_id, requested_path, kind)
+    if req.headers.get("if-none-match", "").strip() == "*":
+        # The file exists, so "*" matches it
+        return Response(status_code=304, headers=headers)
     
-    # Generate ETag for cache validation
-    etag = get_file_etag(actual_file_path)
+    if kind == "video":
+        media_type = "video/mp4"
+        headers["Accept-Ranges"] = "bytes"
+    else:
+        # Determine media type based on file extension
+        media_type = IMAGE_MEDIA_TYPES.get(os.path.splitext(file_path)[1].lower(), "image/jpeg")
     
-    # Check if client has cached version
-    if_none_match = req.headers.get("if-none-match")
-    if if_none_match == etag:
-        return Response(status_code=304)  # Not Modified
+    return _file_response(file_path, media_type, headers, file_stat)
+
+
+@dashboard_router.post("/incident/{incident_id}/video")
+async def serve_incident_video(incident_id: str, request: VideoRequest, req: Request):
+    """
+    Serve video file associated with an incident
     
-    # Return file response with appropriate headers
-    return FileResponse(
-        path=actual_file_path,
-        media_type="video/mp4",
-        filename=os.path.basename(actual_file_path),
-        headers={
-            "Cache-Control": "public, max-age=604800, immutable",  # 7 days
-            "ETag": etag,
-            "Accept-Ranges": "bytes",
-        }
-    )
+    Args:
+        incident_id: The unique incident identifier
+        request: VideoRequest containing file_path
+        
+    Returns:
+        Video file as ZeroCopyFileResponse (or an X-Accel-Redirect / X-Sendfile response)
+    """
+    return await _serve_incident_file(req, incident_id, request.file_path, "video")
 
 
 @dashboard_router.post("/incident/{incident_id}/image")
@@ -232,62 +459,9 @@ async def serve_incident_image(incident_id: str, request: ImageRequest, req: Req
         request: ImageRequest containing image_path
         
     Returns:
-        Image file as FileResponse
+        Image file as ZeroCopyFileResponse (or an X-Accel-Redirect / X-Sendfile response)
     """
-    # Get incident data to verify the file belongs to this incident
-    incident_data = get_incident_by_id_service(incident_id)
-    
-    # Find the requested image file in detected events
-    image_found = False
-    image_path = request.image_path
-    
-    for event in incident_data.get("incident_info", {}).get("detected_events", []):
-        # Check scene image
-        if event.get("image_path") and image_path in event.get("image_path", ""):
-            if os.path.exists(image_path):
-                image_found = True
-                break
-        
-        # Check detection images
-        for det_path in event.get("detected_elements_paths", []):
-            if image_path in det_path and os.path.exists(image_path):
-                image_found = True
-                break
-        
-        if image_found:
-            break
-    
-    if not image_found:
-        raise HTTPException(status_code=404, detail=f"Image file not found for incident {incident_id}")
-    
-    if not os.path.exists(image_path):
-        raise HTTPException(status_code=404, detail="Image file not found on server")
-    
-    # Generate ETag for cache validation
-    etag = get_file_etag(image_path)
-    
-    # Check if client has cached version
-    if_none_match = req.headers.get("if-none-match")
-    if if_none_match == etag:
-        return Response(status_code=304)  # Not Modified
-    
-    # Determine media type based on file extension
-    if image_path.lower().endswith('.jpg') or image_path.lower().endswith('.jpeg'):
-        media_type = "image/jpeg"
-    elif image_path.lower().endswith('.png'):
-        media_type = "image/png"
-    else:
-        media_type = "image/jpeg"  # Default
-    
-    return FileResponse(
-        path=image_path,
-        media_type=media_type,
-        filename=os.path.basename(image_path),
-        headers={
-            "Cache-Control": "public, max-age=604800, immutable",  # 7 days
-            "ETag": etag,
-        }
-    )
+    return await _serve_incident_file(req, incident_id, request.image_path, "image")
 
 
 @dashboard_router.post("/incident/{incident_id}/status")
@@ -302,7 +476,9 @@ async def update_incident_status(incident_id: str, request: StatusUpdateRequest)
     Returns:
         Dict containing success message and updated incident info
     """
-    return update_incident_status_service(incident_id, request.status)
+    result = await run_in_threadpool(update_incident_status_service, incident_id, request.status.value)
+    _incident_cache.pop(incident_id, None)
+    return result
 
 # TODO: Add dashboard-specific endpoints here
 # Examples:
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, BackgroundTasks, Query
 from typing import Optional
+from datetime import datetime
+from uuid import UUID
 from services.utilities import reverse_geocode
 from services.AI import run_full_ai_analysis
 from models.db_helper import save_ai_analysis_to_db
@@ -20,7 +22,7 @@ from services.mobile import (
 
 # Create router for mobile endpoints
 mobile_router = APIRouter()
-@mobile_router.get("/api/mobile/check-user/{device_id}")
+@mobile_router.get("/check-user/{device_id}")
 async def check_user_registration(device_id: str):
     """
     Check if a user with the given device_id has registered account information.
@@ -69,12 +71,12 @@ def process_ai_analysis_background(incident_id: str, file_path: str, address: st
         logger.error(f"Error in background AI analysis for incident_id={incident_id}: {str(e)}")
         logger.exception("Full traceback:")
 
-@mobile_router.get("api/mobile/health")
+@mobile_router.get("/health")
 async def health_check():
     """Health check endpoint for mobile API"""
     return health_check_service()
 
-@mobile_router.post("/api/mobile/upload-media")
+@mobile_router.post("/upload-media")
 async def upload_incident(
     background_tasks: BackgroundTasks,
     # Device ID (REQUIRED)
@@ -164,17 +166,32 @@ async def upload_incident(
     return {"status": "success", "message": "Done uploading", "incident_id": incident_id}
 
 
-@mobile_router.get("/api/mobile/incidents/formatted")
-async def get_formatted_incidents():
-    """Get incidents formatted for Flutter app display - FROM DATABASE"""
-    return await get_formatted_incidents_from_db_service()
+@mobile_router.get("/incidents/formatted")
+async def get_formatted_incidents(
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    before: Optional[datetime] = None,
+    before_id: Optional[UUID] = None
+):
+    """
+    Get incidents formatted for Flutter app display - FROM DATABASE
+    
+    Returns all incidents, newest first. Pass `limit` to get one page; the
+    response then carries `next_before` and `next_before_id` (timestamp and
+    incident_id of the last incident), which are sent back as `before` and
+    `before_id` to fetch the next page.
+    """
+    if (before is None) != (before_id is None):
+        raise HTTPException(status_code=400, detail="before and before_id must be passed together")
+    return await get_formatted_incidents_from_db_service(
+        limit=limit, before=before, before_id=str(before_id) if before_id else None
+    )
 
-@mobile_router.get("/api/mobile/location/{latitude}/{longitude}")
+@mobile_router.get("/location/{latitude}/{longitude}")
 async def get_location_name(latitude: float, longitude: float):
     """Get location name for specific coordinates"""
     return await get_location_name_service(latitude, longitude)
 
-@mobile_router.post("/api/mobile/register-user")
+@mobile_router.post("/register-user")
 async def register_user(
     device_id: str = Form(..., description="Unique device identifier"),
     national_id: str = Form(..., description="National ID"),
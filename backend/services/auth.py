@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from models.db_helper import transaction
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,8 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 REFRESH_TOKEN_EXPIRE_DAYS = 30  # 30 days
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # bcrypt cost factor
+
 
 
 class AuthService:
@@ -57,6 +61,38 @@ class AuthService:
         to_encode.update({"exp": expire, "iat": datetime.utcnow(), "type": "refresh"})
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=JWT_ALGORITHM)
         return encoded_jwt
+    
+    @staticmethod
+    def verify_token(token: str) -> Optional[Dict[str, Any]]:
+        """Verify and decode a JWT token"""
+        try:
+            return jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            return None
+        except jwt.InvalidTokenError:
+            return None
+    
+    @staticmethod
+    def create_user_tokens(user_id: int, username: str, email: str, 
+                          user_type: str, role: str) -> Dict[str, str]:
+        """Create both access and refresh tokens for a user"""
+        token_data = {
+            "user_id": user_id,
+            "username": username,
+            "email": email,
+            "user_type": user_type,
+            "role": role
+        }
+        
+        access_token = AuthService.create_access_token(token_data)
+        refresh_token = AuthService.create_refresh_token(token_data)
+        
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer"
+        }
+
 
 async def authenticate_dashboard_user(username: str, password: str) -> Dict[str, Any]:
     """
@@ -69,27 +105,24 @@ async def authenticate_dashboard_user(username: str, password: str) -> Dict[str,
     Returns:
         Dict containing authentication result and token if successful
     """
-    from models.db_helper import get_db_connection
     auth_service = AuthService()
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Get user from database
-        cur.execute("""
-            SELECT id, username, password_hash, full_name, is_active
-            FROM dashboard_users
-            WHERE username = %s;
-        """, (username,))
-        
-        user = cur.fetchone()
+        # Get user from database; the connection goes back to the pool
+        # before the (slow) password check
+        with transaction() as (conn, cur):
+            cur.execute("""
+                SELECT id, username, password_hash, full_name, is_active
+                FROM dashboard_users
+                WHERE username = %s;
+            """, (username,))
+            user = cur.fetchone()
         
-        logger.info(f"Authentication attempt for username: {username}")
-        logger.info(f"User found in database: {user is not None}")
+        logger.info("Authentication attempt for username: %s", username)
+        logger.info("User found in database: %s", user is not None)
         
         if not user:
-            logger.warning(f"User '{username}' not found in database")
+            logger.warning("User '%s' not found in database", username)
             return {
                 "status": "error",
                 "message": "Invalid username or password"
@@ -106,18 +139,21 @@ async def authenticate_dashboard_user(username: str, password: str) -> Dict[str,
         
         # Verify password using bcrypt
         try:
-            logger.info(f"Attempting password verification for user: {username}")
-            password_match = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
-            logger.info(f"Password match result: {password_match}")
+            logger.info("Attempting password verification for user: %s", username)
+            # bcrypt is CPU-bound, keep it off the event loop
+            password_match = await run_in_threadpool(
+                bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8')
+            )
+            logger.info("Password match result: %s", password_match)
             
             if not password_match:
-                logger.warning(f"Invalid password for user: {username}")
+                logger.warning("Invalid password for user: %s", username)
                 return {
                     "status": "error",
                     "message": "Invalid username or password"
                 }
         except Exception as e:
-            logger.error(f"Error verifying password for {username}: {str(e)}", exc_info=True)
+            logger.error("Error verifying password for %s: %s", username, e, exc_info=True)
             return {
                 "status": "error",
                 "message": "Invalid username or password"
@@ -133,13 +169,12 @@ async def authenticate_dashboard_user(username: str, password: str) -> Dict[str,
         access_token = auth_service.create_access_token(token_data)
         
         # Update last login
-        cur.execute("""
-            UPDATE dashboard_users 
-            SET last_login = NOW() 
-            WHERE id = %s;
-        """, (user_id,))
-        
-        conn.commit()
+        with transaction() as (conn, cur):
+            cur.execute("""
+                UPDATE dashboard_users 
+                SET last_login = NOW() 
+                WHERE id = %s;
+            """, (user_id,))
         
         return {
             "status": "success",
@@ -158,43 +193,6 @@ async def authenticate_dashboard_user(username: str, password: str) -> Dict[str,
             "status": "error",
             "message": f"Authentication failed: {str(e)}"
         }
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
-    
-    @staticmethod
-    def verify_token(token: str) -> Optional[Dict[str, Any]]:
-        """Verify and decode a JWT token"""
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            return payload
-        except jwt.ExpiredSignatureError:
-            return None
-        except jwt.InvalidTokenError:
-            return None
-    
-    @staticmethod
-    def create_user_tokens(user_id: int, username: str, email: str, 
-                          user_type: str, role: str) -> Dict[str, str]:
-        """Create both access and refresh tokens for a user"""
-        token_data = {
-            "user_id": user_id,
-            "username": username,
-            "email": email,
-            "user_type": user_type,
-            "role": role
-        }
-        
-        access_token = AuthService.create_access_token(token_data)
-        refresh_token = AuthService.create_refresh_token(token_data)
-        
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer"
-        }
 
 
 class UserService:
@@ -15,8 +15,10 @@ from typing import Dict, Any, List, Optional
 import json
 import os
 import logging
+import bcrypt
 from datetime import datetime, timedelta
-from models.db_helper import get_all_incidents_from_db, update_incident_status
+from models.db_helper import get_all_incidents_from_db, get_incident_by_id, update_incident_status, transaction
+from services.auth import BCRYPT_ROUNDS
 
 logger = logging.getLogger(__name__)
 
@@ -123,38 +125,28 @@ def manage_users_service() -> Dict[str, Any]:
     Returns:
         Dict containing user data
     """
-    from models.db_helper import get_db_connection
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # Dashboard users
-        cur.execute("SELECT COUNT(*) FROM dashboard_users;")
-        total_dashboard = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT COUNT(*) FROM dashboard_users WHERE is_active = TRUE;")
-        active_dashboard = cur.fetchone()[0] or 0
-
-        # App users (mobile profiles)
-        cur.execute("SELECT COUNT(*) FROM app_users;")
-        total_app = cur.fetchone()[0] or 0
-
-        # Registered app users (have national_id) vs anonymous
-        cur.execute("SELECT COUNT(*) FROM app_users WHERE national_id IS NOT NULL;")
-        registered_app = cur.fetchone()[0] or 0
+        with transaction() as (conn, cur):
+            # App users (mobile profiles): total and registered (have national_id) in one pass
+            cur.execute("""
+                SELECT
+                    COUNT(*),
+                    COUNT(*) FILTER (WHERE national_id IS NOT NULL)
+                FROM app_users;
+            """)
+            total_app, registered_app = cur.fetchone()
+
+            # Get dashboard users list (the dashboard counts come from it)
+            cur.execute("""
+                SELECT id, username, full_name, is_active, last_login, created_at
+                FROM dashboard_users
+                ORDER BY created_at DESC;
+            """)
+            rows = cur.fetchall()
 
         anonymous_app = total_app - registered_app
 
-        # Combined totals
-        combined_total = total_dashboard + total_app
-
-        # Get dashboard users list
-        cur.execute("""
-            SELECT id, username, full_name, is_active, last_login, created_at
-            FROM dashboard_users
-            ORDER BY created_at DESC;
-        """)
         dashboard_users = [
             {
                 "id": row[0],
@@ -164,11 +156,13 @@ def manage_users_service() -> Dict[str, Any]:
                 "last_login": row[4].isoformat() if row[4] else None,
                 "created_at": row[5].isoformat() if row[5] else None
             }
-            for row in cur.fetchall()
+            for row in rows
         ]
+        total_dashboard = len(dashboard_users)
+        active_dashboard = sum(1 for user in dashboard_users if user["is_active"] is True)
 
-        cur.close()
-        conn.close()
+        # Combined totals
+        combined_total = total_dashboard + total_app
 
         return {
             "status": "success",
@@ -198,6 +192,13 @@ def get_system_status_service() -> Dict[str, Any]:
         Dict containing system status
     """
     # TODO: Implement system monitoring
+    return {
+        "status": "not_implemented",
+        "message": "System monitoring service to be implemented",
+        "api_status": "healthy",
+        "database_status": "healthy",
+        "storage_status": "healthy"
+    }
     
 def edit_dashboard_user_service(user_id: int, full_name: Optional[str], password: Optional[str]) -> Dict[str, Any]:
     """
@@ -211,23 +212,8 @@ def edit_dashboard_user_service(user_id: int, full_name: Optional[str], password
     Returns:
         Dict containing operation status
     """
-    from models.db_helper import get_db_connection
-    import bcrypt
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # Check if user exists
-        cur.execute("SELECT id FROM dashboard_users WHERE id = %s;", (user_id,))
-        if not cur.fetchone():
-            cur.close()
-            conn.close()
-            return {
-                "status": "error",
-                "message": "User not found"
-            }
-
         # Build update query dynamically based on provided fields
         update_parts = []
         params = []
@@ -238,27 +224,30 @@ def edit_dashboard_user_service(user_id: int, full_name: Optional[str], password
             
         if password is not None:
             update_parts.append("password_hash = %s")
-            # Hash the new password
-            salt = bcrypt.gensalt()
+            # Hash the new password before taking a pooled connection
+            salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
             hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
             params.append(hashed.decode('utf-8'))
 
-        if not update_parts:
-            cur.close()
-            conn.close()
-            return {
-                "status": "error",
-                "message": "No fields to update"
-            }
+        with transaction() as (conn, cur):
+            # Check if user exists
+            cur.execute("SELECT id FROM dashboard_users WHERE id = %s;", (user_id,))
+            if not cur.fetchone():
+                return {
+                    "status": "error",
+                    "message": "User not found"
+                }
 
-        # Construct and execute update query
-        query = f"UPDATE dashboard_users SET {', '.join(update_parts)} WHERE id = %s"
-        params.append(user_id)
-        cur.execute(query, params)
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+            if not update_parts:
+                return {
+                    "status": "error",
+                    "message": "No fields to update"
+                }
+
+            # Construct and execute update query
+            query = f"UPDATE dashboard_users SET {', '.join(update_parts)} WHERE id = %s"
+            params.append(user_id)
+            cur.execute(query, params)
 
         return {
             "status": "success",
@@ -282,29 +271,19 @@ def delete_dashboard_user_service(user_id: int) -> Dict[str, Any]:
     Returns:
         Dict containing operation status
     """
-    from models.db_helper import get_db_connection
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        with transaction() as (conn, cur):
+            # Delete the user; RETURNING doubles as the existence check
+            cur.execute("DELETE FROM dashboard_users WHERE id = %s RETURNING id;", (user_id,))
+            deleted = cur.fetchone()
 
-        # Check if user exists
-        cur.execute("SELECT id FROM dashboard_users WHERE id = %s;", (user_id,))
-        if not cur.fetchone():
-            cur.close()
-            conn.close()
+        if not deleted:
             return {
                 "status": "error",
                 "message": "User not found"
             }
 
-        # Delete the user
-        cur.execute("DELETE FROM dashboard_users WHERE id = %s;", (user_id,))
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-
         return {
             "status": "success",
             "message": "User deleted successfully"
@@ -316,13 +295,6 @@ def delete_dashboard_user_service(user_id: int) -> Dict[str, Any]:
             "status": "error",
             "message": f"Failed to delete user: {str(e)}"
         }
-    return {
-        "status": "not_implemented",
-        "message": "System monitoring service to be implemented",
-        "api_status": "healthy",
-        "database_status": "healthy",
-        "storage_status": "healthy"
-    }
 
 def export_data_service(
     data_type: str,
@@ -381,15 +353,8 @@ def get_incident_by_id_service(incident_id: str) -> Dict[str, Any]:
         category, title, severity, detected events, location, and all other analysis results
     """
     try:
-        # Get all incidents from database (we'll filter for the one we need)
-        all_incidents = get_all_incidents_from_db()
-        
-        # Find the specific incident
-        found_incident = None
-        for incident in all_incidents:
-            if incident.get("incident_id") == incident_id:
-                found_incident = incident
-                break
+        # Single-row lookup by primary key
+        found_incident = get_incident_by_id(incident_id)
         
         if not found_incident:
             raise HTTPException(status_code=404, detail=f"Incident with ID {incident_id} not found")
@@ -403,7 +368,7 @@ def get_incident_by_id_service(incident_id: str) -> Dict[str, Any]:
             "severity": found_incident.get("severity"),
             "verified": found_incident.get("verified"),
             "status": found_incident.get("status", "pending"),
-            "timestamp": found_incident.get("timestamp"),
+            "timestamp": found_incident["timestamp"].isoformat() if found_incident.get("timestamp") else None,
             "violence_type": found_incident.get("violence_type"),
             "weapon": found_incident.get("weapon"),
             "site_description": found_incident.get("site_description"),
@@ -461,13 +426,7 @@ def update_incident_status_service(incident_id: str, status: str) -> Dict[str, A
             raise HTTPException(status_code=500, detail=f"Failed to update incident status in database")
         
         # Get the updated incident to return its info
-        all_incidents = get_all_incidents_from_db()
-        updated_incident = None
-        
-        for incident in all_incidents:
-            if incident.get("incident_id") == incident_id:
-                updated_incident = incident
-                break
+        updated_incident = get_incident_by_id(incident_id)
         
         if not updated_incident:
             raise HTTPException(status_code=404, detail=f"Incident with ID {incident_id} not found")
@@ -481,7 +440,7 @@ def update_incident_status_service(incident_id: str, status: str) -> Dict[str, A
                 "title": updated_incident.get("title", ""),
                 "category": updated_incident.get("category", ""),
                 "severity": updated_incident.get("severity", ""),
-                "timestamp": updated_incident.get("timestamp", ""),
+                "timestamp": updated_incident["timestamp"].isoformat() if updated_incident.get("timestamp") else "",
                 "status": updated_incident.get("status", "")
             }
         }
@@ -498,34 +457,25 @@ def create_dashboard_user_service(username: str, full_name: str, password: str)
     Create a new dashboard user in the database.
     Returns a dict with status and message.
     """
-    from models.db_helper import get_db_connection
-    import bcrypt
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        # Check if username already exists
-        cur.execute("SELECT id FROM dashboard_users WHERE username = %s;", (username,))
-        if cur.fetchone():
-            cur.close()
-            conn.close()
-            return {"status": "error", "message": "Username already exists."}
-
-        # Hash the password using bcrypt
-        salt = bcrypt.gensalt()
+        # Hash the password using bcrypt (before taking a pooled connection)
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
-        cur.execute(
-            """
-            INSERT INTO dashboard_users (username, full_name, password_hash, is_active, created_at)
-            VALUES (%s, %s, %s, TRUE, NOW())
-            RETURNING id;
-            """,
-            (username, full_name, password_hash)
-        )
-        user_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
-        return {"status": "success", "message": "User created successfully.", "user_id": user_id}
+        with transaction() as (conn, cur):
+            # Insert and duplicate check in one statement (username is UNIQUE)
+            cur.execute(
+                """
+                INSERT INTO dashboard_users (username, full_name, password_hash, is_active, created_at)
+                VALUES (%s, %s, %s, TRUE, NOW())
+                ON CONFLICT (username) DO NOTHING
+                RETURNING id;
+                """,
+                (username, full_name, password_hash)
+            )
+            row = cur.fetchone()
+        if not row:
+            return {"status": "error", "message": "Username already exists."}
+        return {"status": "success", "message": "User created successfully.", "user_id": row[0]}
     except Exception as e:
         logger.error(f"Error creating dashboard user: {str(e)}", exc_info=True)
         return {"status": "error", "message": f"Failed to create user: {str(e)}"}
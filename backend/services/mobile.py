@@ -1,4 +1,5 @@
 from fastapi import File, UploadFile, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional
 import os
@@ -9,7 +10,10 @@ from datetime import datetime
 import json
 import httpx
 import asyncio
-from models.db_helper import get_all_incidents_from_db, create_registered_user
+import logging
+from models.db_helper import get_all_incidents_from_db, count_incidents, create_registered_user, transaction
+
+logger = logging.getLogger(__name__)
 
 # # JSON file paths
 INCIDENTS_JSON_FILE = "data/incidents_data.json"
@@ -131,23 +135,22 @@ MAX_FILE_SIZE = 50 * 1024 * 1024
 #         print(f"❌ Error loading configuration: {e}")
 #         config_data = {}
 
-async def check_user_registration_service(device_id: str):
-    """Service function to check if user with device_id has registered account info"""
-    conn = None
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
+def _get_app_user_by_device(device_id: str):
+    """Fetch (id, national_id, full_name, contact_info) for a device, or None"""
+    with transaction() as (conn, cur):
         # Check if device exists and has registration info
         cur.execute("""
             SELECT id, national_id, full_name, contact_info 
             FROM app_users 
             WHERE device_id = %s;
         """, (device_id,))
-        
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
+        return cur.fetchone()
+
+async def check_user_registration_service(device_id: str):
+    """Service function to check if user with device_id has registered account info"""
+    try:
+        # Database access blocks, keep it off the event loop
+        result = await run_in_threadpool(_get_app_user_by_device, device_id)
         
         if result:
             user_id, national_id, full_name, contact_info = result
@@ -176,8 +179,6 @@ async def check_user_registration_service(device_id: str):
             }
             
     except Exception as e:
-        if conn:
-            conn.close()
         logger.error(f"Error checking user registration: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error checking user registration: {str(e)}")
 
@@ -665,10 +666,19 @@ def health_check_service():
     """Service function for health check"""
     return {"status": "healthy", "message": "Mobile API is running"}
 
-async def get_formatted_incidents_from_db_service():
-    """Service function to get formatted incidents from DATABASE for Flutter app"""
+async def get_formatted_incidents_from_db_service(
+    limit: Optional[int] = None,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None
+):
+    """
+    Service function to get formatted incidents from DATABASE for Flutter app, newest first.
+    Returns every incident unless a page is requested with limit and/or the (before, before_id) cursor.
+    """
     try:
-        incidents = get_all_incidents_from_db()
+        incidents = await run_in_threadpool(
+            get_all_incidents_from_db, limit=limit, before_ts=before, before_id=before_id
+        )
         
         formatted_incidents = []
         
@@ -736,11 +746,17 @@ async def get_formatted_incidents_from_db_service():
             
             formatted_incidents.append(formatted_incident)
         
-        return {
+        paged = limit is not None or before is not None
+        response = {
             "incidents": formatted_incidents,
-            "total_incidents": len(formatted_incidents),
+            "total_incidents": await run_in_threadpool(count_incidents) if paged else len(formatted_incidents),
             "message": "Incidents retrieved successfully"
         }
+        if limit is not None and len(incidents) == limit:
+            # Cursor for the next page
+            response["next_before"] = incidents[-1]['timestamp']
+            response["next_before_id"] = incidents[-1]['incident_id']
+        return response
         
     except Exception as e:
         print(f"Error formatting incidents from database: {e}")
@@ -751,7 +767,7 @@ async def get_formatted_incidents_from_db_service():
 async def register_user_service(device_id: str, national_id: str, full_name: str, contact_info: str):
     """Service function to register a user account"""
     try:
-        user_id = create_registered_user(national_id, full_name, contact_info, device_id)
+        user_id = await run_in_threadpool(create_registered_user, national_id, full_name, contact_info, device_id)
         
         if user_id:
             return {
@@ -316,11 +316,11 @@ class IncidentService:
     def update_status(self, incident_id: str, status: str, 
                      dashboard_user_id: int) -> bool:
         """
-        Update incident status (approve/reject)
-        Status can be: 'pending', 'approved', 'rejected'
+        Update incident status (accept/reject)
+        Status can be: 'pending', 'accepted', 'rejected' (enforced by ck_incidents_status)
         """
         try:
-            valid_statuses = ['pending', 'approved', 'rejected']
+            valid_statuses = ['pending', 'accepted', 'rejected']
             if status not in valid_statuses:
                 raise ValueError(f"Invalid status. Must be one of: {valid_statuses}")
             
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk incident saving (save_ai_analyses_bulk) and the legacy
+JSON import built on it. Needs the database configured in .env.
+"""
+import uuid
+
+from models.db_helper import get_incident_by_id, save_ai_analyses_bulk, transaction
+from models.import_incidents_json import import_incidents
+
+
+def _legacy_incident(incident_id, device_id):
+    return {
+        "incident_id": incident_id,
+        "timestamp_received": "2025-10-30T22:36:17.287571",
+        "device_id": device_id,
+        "location": {"latitude": 30.0444, "longitude": 31.2357},
+        "incident": {"description": "Bulk import test", "is_anonymous": True,
+                     "timestamp": "2025-10-30T19:36:17.158923+00:00"},
+        "files": [
+            {"file_type": "video", "file_path": "data\\uploads\\videos\\bulk-test.mp4"},
+            {"file_type": "photo", "file_path": "data\\uploads\\images\\bulk-test.jpg"},
+        ],
+    }
+
+
+def _delete_incidents(incident_ids):
+    with transaction() as (conn, cur):
+        cur.execute(
+            "DELETE FROM incidents WHERE incident_id = ANY(%s::uuid[]) RETURNING location_id",
+            (incident_ids,)
+        )
+        location_ids = [row[0] for row in cur.fetchall()]
+        cur.execute("DELETE FROM locations WHERE id = ANY(%s)", (location_ids,))
+
+
+def test_bulk_import():
+    """Import two incidents, re-run the import, and check a failing batch saves nothing"""
+    device_id = "bulk-test-" + uuid.uuid4().hex[:8]
+    incident_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    incidents = [_legacy_incident(incident_id, device_id) for incident_id in incident_ids]
+    try:
+        print("1. Importing two incidents...")
+        assert import_incidents(incidents) == 2
+        for incident_id in incident_ids:
+            saved = get_incident_by_id(incident_id)
+            assert saved is not None, f"{incident_id} was not saved"
+            assert saved["description"] == "Bulk import test"
+            assert saved["real_files"] == ["data/uploads/videos/bulk-test.mp4", "data/uploads/images/bulk-test.jpg"]
+            assert saved["status"] == "pending"
+        with transaction() as (conn, cur):
+            cur.execute(
+                "SELECT count(*), count(*) FILTER (WHERE media_type = 'video') FROM media_files WHERE incident_id = ANY(%s::uuid[])",
+                (incident_ids,)
+            )
+            assert cur.fetchone() == (4, 2)
+        print("   ✅ Incidents and media files saved")
+
+        print("2. Re-running the import...")
+        assert import_incidents(incidents) == 0
+        print("   ✅ Existing incidents skipped")
+
+        print("3. Saving a batch that contains an existing incident...")
+        new_id = str(uuid.uuid4())
+        batch = [
+            {"incident_id": new_id, "ai_analysis": {}, "latitude": 1, "longitude": 2, "address": None,
+             "timestamp": None, "file_paths": [], "device_id": device_id},
+            {"incident_id": incident_ids[0], "ai_analysis": {}, "latitude": 1, "longitude": 2, "address": None,
+             "timestamp": None, "file_paths": [], "device_id": device_id},
+        ]
+        try:
+            save_ai_analyses_bulk(batch)
+        except Exception:
+            pass
+        else:
+            raise AssertionError("duplicate incident_id should fail the batch")
+        assert get_incident_by_id(new_id) is None, "failed batch must be rolled back"
+        print("   ✅ Failed batch rolled back")
+    finally:
+        _delete_incidents(incident_ids)
+        with transaction() as (conn, cur):
+            cur.execute("DELETE FROM app_users WHERE device_id = %s", (device_id,))
+
+
+if __name__ == "__main__":
+    test_bulk_import()
+    print("All bulk import tests passed")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for byte-range handling of incident media responses
+(no server or database needed)
+"""
+import asyncio
+import os
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.dashboard_endpoints import ZeroCopyFileResponse, _RangeNotSatisfiable, _parse_byte_range
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+def _client(path):
+    app = FastAPI()
+
+    @app.get("/file")
+    async def serve_file():
+        return ZeroCopyFileResponse(path, media_type="video/mp4")
+
+    return TestClient(app)
+
+
+def _assert_unsatisfiable(header, size):
+    try:
+        _parse_byte_range(header, size)
+    except _RangeNotSatisfiable:
+        return
+    raise AssertionError(f"{header!r} should be unsatisfiable for size {size}")
+
+
+def test_parse_byte_range():
+    """Range header parsing"""
+    assert _parse_byte_range(None, 100) is None
+    assert _parse_byte_range("bytes=0-9", 100) == (0, 10)
+    assert _parse_byte_range("bytes=90-", 100) == (90, 10)
+    assert _parse_byte_range("bytes=90-500", 100) == (90, 10)
+    assert _parse_byte_range("bytes=-10", 100) == (90, 10)
+    assert _parse_byte_range("bytes=-500", 100) == (0, 100)
+    # Malformed, multi-range or reversed ranges are ignored (full response)
+    assert _parse_byte_range("bytes=-", 100) is None
+    assert _parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert _parse_byte_range("items=0-1", 100) is None
+    assert _parse_byte_range("bytes=9-3", 100) is None
+    # No requested byte exists
+    _assert_unsatisfiable("bytes=-0", 100)
+    _assert_unsatisfiable("bytes=100-", 100)
+    _assert_unsatisfiable("bytes=150-200", 100)
+    _assert_unsatisfiable("bytes=-5", 0)
+    print("✅ _parse_byte_range")
+
+
+def test_streamed_ranges():
+    """Ranges served by the regular (chunked) response path"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "clip.mp4")
+        with open(path, "wb") as file:
+            file.write(CONTENT)
+        client = _client(path)
+
+        response = client.get("/file")
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["content-length"] == str(len(CONTENT))
+
+        response = client.get("/file", headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response.content == CONTENT[10:20]
+        assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+        assert response.headers["content-length"] == "10"
+
+        response = client.get("/file", headers={"Range": "bytes=-24"})
+        assert response.status_code == 206
+        assert response.content == CONTENT[-24:]
+
+        for header in ("bytes=-0", f"bytes={len(CONTENT)}-"):
+            response = client.get("/file", headers={"Range": header})
+            assert response.status_code == 416, header
+            assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+    print("✅ Streamed range responses")
+
+
+def test_zerocopy_ranges():
+    """Ranges handed to a server that supports http.response.zerocopysend"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "clip.mp4")
+        with open(path, "wb") as file:
+            file.write(CONTENT)
+
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.zerocopysend":
+                # Read what the server would sendfile() before the fd is closed
+                message = dict(message, body=os.pread(message["file"], message["count"], message["offset"]))
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "headers": [(b"range", b"bytes=100-199")],
+            "extensions": {"http.response.zerocopysend": {}},
+        }
+        asyncio.run(ZeroCopyFileResponse(path, media_type="video/mp4")(scope, receive, send))
+        assert messages[0]["status"] == 206
+        assert messages[1]["type"] == "http.response.zerocopysend"
+        assert messages[1]["body"] == CONTENT[100:200]
+    print("✅ Zero-copy range responses")
+
+
+if __name__ == "__main__":
+    test_parse_byte_range()
+    test_streamed_ranges()
+    test_zerocopy_ranges()
+    print("All range tests passed")
@@ -191,9 +191,9 @@ def test_simple_system():
     except Exception as e:
         print(f"❌ Failed: {e}")
     
-    # Test 7: Dashboard user approves incident
+    # Test 7: Dashboard user accepts incident
     print("\n" + "=" * 70)
-    print("[Test 7] Dashboard user approves incident")
+    print("[Test 7] Dashboard user accepts incident")
     print("=" * 70)
     
     incident_service = IncidentService(conn)
@@ -201,12 +201,12 @@ def test_simple_system():
     try:
         success = incident_service.update_status(
             incident_id=profile_incident_id,
-            status="approved",
+            status="accepted",
             dashboard_user_id=result['id']
         )
         
         if success:
-            print(f"✅ Incident approved successfully")
+            print(f"✅ Incident accepted successfully")
             
             # Verify status was updated
             cur = conn.cursor()
@@ -216,7 +216,7 @@ def test_simple_system():
             cur.close()
             print(f"   New status: {status}")
         else:
-            print("❌ Failed to approve incident")
+            print("❌ Failed to accept incident")
     except Exception as e:
         print(f"❌ Failed: {e}")
     
@@ -317,7 +317,7 @@ def test_simple_system():
     print("   • Profile creation: OPTIONAL")
     print("   • Anonymous reporting: ALLOWED")
     print("   • Dashboard users: Simple login")
-    print("   • All dashboard users can approve/reject incidents")
+    print("   • All dashboard users can accept/reject incidents")
     print("\n⚠️  Remember to:")
     print("   1. Change default admin password (Admin@123)")
     print("   2. Add your SECRET_KEY to .env file")